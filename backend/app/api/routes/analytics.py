@@ -1,132 +1,86 @@
-from datetime import datetime, timedelta, timezone
-import random
+from typing import Optional
 
-from fastapi import APIRouter, Depends
-from sqlalchemy import select, func
+from fastapi import APIRouter, Depends, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
-from app.core.security import get_current_user
-from app.models import Order, Customer, Product, OrderItem, User
+from app.core.database import get_read_db
+from app.core.http_cache import LastRendered, conditional_json_response
+from app.core.security import Principal, get_current_user, principal_cache, token_cache
+from app.core.singleflight import analytics_flight
 from app.schemas import StatsResponse, RevenueDataPoint, TopProductResponse
+from app.services.catalog import catalog_cache
+from app.services.product_sales import SALES_BUCKET_DAYS, top_selling_products
+from app.services.revenue import get_revenue_series
+from app.services.stats import stats_cache
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
 
+# Rendered body of the latest stats snapshot, reused until the snapshot changes
+_rendered_stats = LastRendered()
+
+
 @router.get("/stats", response_model=StatsResponse)
 async def get_dashboard_stats(
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user),
 ):
-    """Get overall dashboard statistics."""
-    # Total revenue
-    revenue_result = await db.execute(
-        select(func.sum(Order.total)).where(Order.status != "cancelled")
-    )
-    total_revenue = revenue_result.scalar() or 0
-    
-    # Total orders
-    orders_result = await db.execute(select(func.count(Order.id)))
-    total_orders = orders_result.scalar() or 0
-    
-    # Average order value
-    avg_order_value = total_revenue / total_orders if total_orders > 0 else 0
-    
-    # Total customers
-    customers_result = await db.execute(select(func.count(Customer.id)))
-    total_customers = customers_result.scalar() or 0
+    """Get overall dashboard statistics.
     
-    # Total products
-    products_result = await db.execute(select(func.count(Product.id)))
-    total_products = products_result.scalar() or 0
-    
-    # Pending orders
-    pending_result = await db.execute(
-        select(func.count(Order.id)).where(Order.status == "pending")
-    )
-    pending_orders = pending_result.scalar() or 0
-    
-    # Delivered orders
-    delivered_result = await db.execute(
-        select(func.count(Order.id)).where(Order.status == "delivered")
-    )
-    delivered_orders = delivered_result.scalar() or 0
-    
-    return StatsResponse(
-        total_revenue=round(total_revenue, 2),
-        total_orders=total_orders,
-        average_order_value=round(avg_order_value, 2),
-        total_customers=total_customers,
-        total_products=total_products,
-        pending_orders=pending_orders,
-        delivered_orders=delivered_orders,
-    )
+    Responses carry an ETag and answer `If-None-Match` with 304.
+    """
+    stats = await stats_cache.get(db)
+    rendered = _rendered_stats.get(stats, lambda: StatsResponse(
+        total_revenue=round(stats.total_revenue, 2),
+        total_orders=stats.total_orders,
+        average_order_value=round(stats.average_order_value, 2),
+        total_customers=stats.total_customers,
+        total_products=stats.total_products,
+        pending_orders=stats.orders_by_status["pending"],
+        delivered_orders=stats.orders_by_status["delivered"],
+    ))
+    return conditional_json_response(request, rendered, "private, no-cache")
 
 
 @router.get("/revenue", response_model=list[RevenueDataPoint])
 async def get_revenue_data(
-    days: int = 30,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    days: int = Query(30, ge=1, le=365),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user),
 ):
-    """Get revenue data for the chart.
-    
-    Note: For now, returns sample data. In production, this would
-    aggregate real order data by day.
+    """Get daily revenue for the chart, oldest day first.
+
+    Served from the `daily_revenue` rollup, so the cost depends on `days`
+    rather than on the size of the orders table.
     """
-    # Generate sample data for demonstration
-    # In production, you would query the database for actual revenue per day
-    data = []
-    base_revenue = 3000
-    base_expenses = 1500
-    
-    for i in range(days, 0, -1):
-        date = datetime.now(timezone.utc) - timedelta(days=i)
-        # Add some randomness for realistic looking data
-        revenue = base_revenue + random.uniform(-500, 1500)
-        expenses = base_expenses + random.uniform(-300, 500)
-        
-        data.append(RevenueDataPoint(
-            date=date.strftime("%Y-%m-%d"),
-            revenue=round(revenue, 2),
-            expenses=round(expenses, 2),
-        ))
-    
-    return data
+    return await analytics_flight.do("revenue", days, lambda: get_revenue_series(db, days))
 
 
 @router.get("/top-products", response_model=list[TopProductResponse])
 async def get_top_products(
-    limit: int = 5,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    limit: int = Query(5, ge=1, le=100),
+    days: Optional[int] = Query(None, ge=1, le=SALES_BUCKET_DAYS, description="Only count the last N days"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user),
 ):
-    """Get top selling products."""
-    # Get products with most order items
-    query = (
-        select(
-            Product.id,
-            Product.name,
-            Product.price,
-            Product.image_url,
-            func.coalesce(func.sum(OrderItem.quantity), 0).label("sold"),
-        )
-        .outerjoin(OrderItem, Product.id == OrderItem.product_id)
-        .group_by(Product.id)
-        .order_by(func.sum(OrderItem.quantity).desc().nullslast())
-        .limit(limit)
-    )
+    """Get top selling products, all time or over a recent window.
     
-    result = await db.execute(query)
-    rows = result.all()
-    
-    return [
-        TopProductResponse(
-            id=row.id,
-            name=row.name,
-            price=row.price,
-            sold=int(row.sold),
-            image_url=row.image_url,
-        )
-        for row in rows
-    ]
+    Concurrent identical requests share one query.
+    """
+    return await analytics_flight.do(
+        "top-products", (limit, days), lambda: top_selling_products(db, limit, days)
+    )
+
+
+@router.get("/cache")
+async def get_cache_stats(
+    current_user: Principal = Depends(get_current_user),
+):
+    """Get hit/miss counters for the in-process read caches and request coalescing."""
+    return {
+        "catalog": catalog_cache.stats(),
+        "principals": principal_cache.stats(),
+        "tokens": token_cache.stats(),
+        "coalescing": analytics_flight.stats(),
+    }
@@ -6,12 +6,13 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.core.security import (
+    Principal,
     authenticate_user,
     create_access_token,
     get_current_user,
-    get_password_hash,
+    get_password_hash_async,
 )
 from app.models import User
 from app.schemas import Token, UserCreate, UserResponse
@@ -36,7 +37,7 @@ async def login(
     access_token = create_access_token(
         data={"sub": user.email}, expires_delta=access_token_expires
     )
-    return Token(access_token=access_token)
+    return Token(access_token=access_token, token_type="bearer")
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
@@ -56,7 +57,7 @@ async def register(
     # Create new user
     user = User(
         email=user_data.email,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=await get_password_hash_async(user_data.password),
         full_name=user_data.full_name,
         role=user_data.role,
     )
@@ -68,7 +69,12 @@ async def register(
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get current user information."""
-    return current_user
+    result = await db.execute(select(User).where(User.id == current_user.id))
+    user = result.scalar_one_or_none()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
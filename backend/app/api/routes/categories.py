@@ -1,42 +1,54 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
-from app.core.security import get_current_user
-from app.models import Category, User
+from app.core.database import get_db, get_read_db
+from app.core.http_cache import conditional_json_response, render_json
+from app.core.security import Principal, get_current_user
+from app.models import Category
 from app.schemas import CategoryCreate, CategoryResponse
+from app.services.catalog import CATALOG_CACHE_CONTROL, catalog_cache, invalidate_category
 
 router = APIRouter(prefix="/categories", tags=["Categories"])
 
 
 @router.get("/", response_model=list[CategoryResponse])
 async def list_categories(
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
 ):
     """List all categories."""
-    result = await db.execute(select(Category).order_by(Category.name))
-    return result.scalars().all()
+    async def load():
+        result = await db.execute(select(Category).order_by(Category.name))
+        return render_json([CategoryResponse.model_validate(c) for c in result.scalars().all()])
+    
+    rendered = await catalog_cache.get_or_load(("categories",), load)
+    return conditional_json_response(request, rendered, CATALOG_CACHE_CONTROL)
 
 
 @router.get("/{category_id}", response_model=CategoryResponse)
 async def get_category(
     category_id: int,
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get a single category by ID."""
-    result = await db.execute(select(Category).where(Category.id == category_id))
-    category = result.scalar_one_or_none()
-    if not category:
-        raise HTTPException(status_code=404, detail="Category not found")
-    return category
+    async def load():
+        result = await db.execute(select(Category).where(Category.id == category_id))
+        category = result.scalar_one_or_none()
+        if not category:
+            raise HTTPException(status_code=404, detail="Category not found")
+        return render_json(CategoryResponse.model_validate(category))
+    
+    rendered = await catalog_cache.get_or_load(("category", category_id), load)
+    return conditional_json_response(request, rendered, CATALOG_CACHE_CONTROL)
 
 
 @router.post("/", response_model=CategoryResponse, status_code=status.HTTP_201_CREATED)
 async def create_category(
     category_data: CategoryCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Create a new category (admin only)."""
     # Check if category with same name already exists
@@ -47,5 +59,6 @@ async def create_category(
     category = Category(**category_data.model_dump())
     db.add(category)
     await db.commit()
+    invalidate_category(category.id)
     await db.refresh(category)
     return category
@@ -1,54 +1,96 @@
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
-from app.core.security import get_current_user
-from app.models import Customer, User
+from app.core.database import get_db, get_read_db
+from app.core.export import ExportFormat, stream_export
+from app.core.pagination import apply_keyset, set_page_headers, split_page
+from app.core.security import Principal, get_current_user
+from app.models import Customer
 from app.schemas import CustomerCreate, CustomerResponse
 
 router = APIRouter(prefix="/customers", tags=["Customers"])
 
 
+def customer_search_filter(search: str):
+    return (
+        (Customer.email.ilike(f"%{search}%")) |
+        (Customer.first_name.ilike(f"%{search}%")) |
+        (Customer.last_name.ilike(f"%{search}%"))
+    )
+
+
 @router.get("/", response_model=list[CustomerResponse])
 async def list_customers(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
     search: Optional[str] = None,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    cursor: Optional[str] = Query(None, description="Pass empty to start cursor pagination"),
+    include_total: bool = False,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user),
 ):
-    """List all customers with optional search."""
+    """List all customers with optional search.
+    
+    With `cursor` set, pages by (created_at, id) instead of offset and
+    returns the next page's cursor in the `X-Next-Cursor` header.
+    `include_total` adds an `X-Total-Count` header.
+    """
     query = select(Customer)
+    count_query = select(func.count(Customer.id))
     
     if search:
-        query = query.where(
-            (Customer.email.ilike(f"%{search}%")) |
-            (Customer.first_name.ilike(f"%{search}%")) |
-            (Customer.last_name.ilike(f"%{search}%"))
-        )
+        search_filter = customer_search_filter(search)
+        query = query.where(search_filter)
+        count_query = count_query.where(search_filter)
+    
+    total = None
+    if include_total:
+        total_result = await db.execute(count_query)
+        total = total_result.scalar() or 0
+    
+    if cursor is not None:
+        result = await db.execute(apply_keyset(query, Customer, cursor, limit))
+        customers, next_cursor = split_page(result.scalars().all(), limit)
+        set_page_headers(response, next_cursor, total)
+        return customers
     
     query = query.order_by(Customer.created_at.desc()).offset(skip).limit(limit)
     result = await db.execute(query)
+    set_page_headers(response, total=total)
     return result.scalars().all()
 
 
 @router.get("/count")
 async def count_customers(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get total customer count."""
     result = await db.execute(select(func.count(Customer.id)))
     return {"count": result.scalar()}
 
 
+@router.get("/export")
+async def export_customers(
+    fmt: ExportFormat = Query(ExportFormat.ndjson, alias="format"),
+    search: Optional[str] = None,
+    current_user: Principal = Depends(get_current_user),
+):
+    """Stream every matching customer as NDJSON or CSV, oldest first."""
+    query = select(*Customer.__table__.columns)
+    if search:
+        query = query.where(customer_search_filter(search))
+    return stream_export(query.order_by(Customer.id), fmt, "customers")
+
+
 @router.get("/{customer_id}", response_model=CustomerResponse)
 async def get_customer(
     customer_id: int,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Get a single customer by ID."""
     result = await db.execute(select(Customer).where(Customer.id == customer_id))
@@ -83,7 +125,7 @@ async def update_customer(
     customer_id: int,
     customer_data: CustomerCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Update a customer."""
     result = await db.execute(select(Customer).where(Customer.id == customer_id))
@@ -104,7 +146,7 @@ async def update_customer(
 async def delete_customer(
     customer_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Delete a customer."""
     result = await db.execute(select(Customer).where(Customer.id == customer_id))
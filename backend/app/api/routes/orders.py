@@ -1,22 +1,55 @@
-import uuid
-from typing import Optional
+from typing import Any, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, status
+from fastapi.responses import JSONResponse
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.core.database import get_db
-from app.core.security import get_current_user
-from app.models import Order, OrderItem, User
-from app.schemas import OrderCreate, OrderResponse, OrderUpdate
+from app.core.database import get_db, get_read_db
+from app.core.export import ExportFormat, stream_export
+from app.core.http_cache import FastJSONResponse
+from app.core.pagination import apply_keyset, page_headers, split_page
+from app.core.security import Principal, get_current_user
+from app.models import Order, OrderItem
+from app.schemas import BulkOrderResult, OrderCreate, OrderResponse, OrderUpdate
+from app.services.idempotency import (
+    IDEMPOTENCY_HEADER,
+    REPLAYED_HEADER,
+    IdempotencyKeyReused,
+    StoredResponse,
+    order_idempotency,
+    request_fingerprint,
+)
+from app.services.inventory import (
+    RELEASED_STATUSES,
+    InsufficientStockError,
+    UnknownProductsError,
+    record_order_stock_status_change,
+    reserve_stock,
+)
+from app.services.catalog import invalidate_all_products, invalidate_products
+from app.services.orders import generate_order_number, ingest_orders
+from app.services.product_sales import record_order_sales, record_order_sales_status_change
+from app.services.responses import (
+    ORDER_EXPANSIONS,
+    ORDER_SHAPE,
+    order_dicts,
+    order_load_options,
+    parse_expand,
+)
+from app.services.revenue import record_order_created, record_order_status_change
+from app.services.stats import stats_cache
 
 router = APIRouter(prefix="/orders", tags=["Orders"])
 
+# Largest accepted POST /orders/bulk payload
+MAX_BULK_ORDERS = 50_000
 
-def generate_order_number() -> str:
-    """Generate a unique order number."""
-    return f"ORD-{uuid.uuid4().hex[:8].upper()}"
+# Everything OrderResponse serializes, loaded up front (lazy loads fail under asyncio)
+ORDER_RESPONSE_OPTIONS = tuple(order_load_options())
+
+EXPAND_DESCRIPTION = "Comma-separated relations to include: customer, items, items.product (default: all)"
 
 
 @router.get("/", response_model=list[OrderResponse])
@@ -25,26 +58,50 @@ async def list_orders(
     limit: int = Query(50, ge=1, le=100),
     status_filter: Optional[str] = Query(None, alias="status"),
     customer_id: Optional[int] = None,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    cursor: Optional[str] = Query(None, description="Pass empty to start cursor pagination"),
+    include_total: bool = False,
+    expand: Optional[str] = Query(None, description=EXPAND_DESCRIPTION),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user),
 ):
-    """List all orders with optional filtering."""
-    query = select(Order).options(selectinload(Order.items))
+    """List all orders with optional filtering.
+    
+    With `cursor` set, pages by (created_at, id) instead of offset and
+    returns the next page's cursor in the `X-Next-Cursor` header.
+    `include_total` adds an `X-Total-Count` header. `expand` limits the
+    nested data; each expanded relation costs one query per page.
+    """
+    expansions = parse_expand(expand, ORDER_EXPANSIONS)
+    query = select(*ORDER_SHAPE.columns)
+    count_query = select(func.count(Order.id))
     
     if status_filter:
         query = query.where(Order.status == status_filter)
+        count_query = count_query.where(Order.status == status_filter)
     if customer_id is not None:
         query = query.where(Order.customer_id == customer_id)
+        count_query = count_query.where(Order.customer_id == customer_id)
     
-    query = query.order_by(Order.created_at.desc()).offset(skip).limit(limit)
-    result = await db.execute(query)
-    return result.scalars().all()
+    total = None
+    if include_total:
+        total_result = await db.execute(count_query)
+        total = total_result.scalar() or 0
+    
+    next_cursor = None
+    if cursor is not None:
+        result = await db.execute(apply_keyset(query, Order, cursor, limit))
+        rows, next_cursor = split_page(result.all(), limit)
+    else:
+        query = query.order_by(Order.created_at.desc()).offset(skip).limit(limit)
+        result = await db.execute(query)
+        rows = result.all()
+    return FastJSONResponse(await order_dicts(db, rows, expansions), headers=page_headers(next_cursor, total))
 
 
 @router.get("/count")
 async def count_orders(
     status_filter: Optional[str] = Query(None, alias="status"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get total order count."""
     query = select(func.count(Order.id))
@@ -54,39 +111,43 @@ async def count_orders(
     return {"count": result.scalar()}
 
 
+@router.get("/export")
+async def export_orders(
+    fmt: ExportFormat = Query(ExportFormat.ndjson, alias="format"),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    customer_id: Optional[int] = None,
+    current_user: Principal = Depends(get_current_user),
+):
+    """Stream every matching order as NDJSON or CSV, oldest first."""
+    query = select(*Order.__table__.columns)
+    if status_filter:
+        query = query.where(Order.status == status_filter)
+    if customer_id is not None:
+        query = query.where(Order.customer_id == customer_id)
+    return stream_export(query.order_by(Order.id), fmt, "orders")
+
+
 @router.get("/stats")
 async def get_order_stats(
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Get order statistics."""
-    # Total orders
-    total_result = await db.execute(select(func.count(Order.id)))
-    total = total_result.scalar() or 0
-    
-    # By status
-    statuses = ["pending", "processing", "shipped", "delivered", "cancelled"]
-    stats = {"total": total}
-    
-    for status_name in statuses:
-        result = await db.execute(
-            select(func.count(Order.id)).where(Order.status == status_name)
-        )
-        stats[status_name] = result.scalar() or 0
-    
-    return stats
+    stats = await stats_cache.get(db)
+    return {"total": stats.total_orders, **stats.orders_by_status}
 
 
 @router.get("/{order_id}", response_model=OrderResponse)
 async def get_order(
     order_id: int,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    expand: Optional[str] = Query(None, description=EXPAND_DESCRIPTION),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Get a single order by ID."""
     result = await db.execute(
         select(Order)
-        .options(selectinload(Order.items))
+        .options(*order_load_options(parse_expand(expand, ORDER_EXPANSIONS)))
         .where(Order.id == order_id)
     )
     order = result.scalar_one_or_none()
@@ -95,12 +156,22 @@ async def get_order(
     return order
 
 
-@router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
-async def create_order(
-    order_data: OrderCreate,
-    db: AsyncSession = Depends(get_db),
-):
-    """Create a new order."""
+async def _insert_order(db: AsyncSession, order_data: OrderCreate) -> tuple[Order, list[int]]:
+    """Reserve stock and add the order with its items, without committing.
+    
+    Also returns the ids of the products whose stock was reserved.
+    """
+    reserved = []
+    if order_data.status not in RELEASED_STATUSES:
+        try:
+            reserved = await reserve_stock(db, [(item.product_id, item.quantity) for item in order_data.items])
+        except UnknownProductsError as e:
+            await db.rollback()
+            raise HTTPException(status_code=422, detail=str(e))
+        except InsufficientStockError as e:
+            await db.rollback()
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    
     # Create order
     order = Order(
         order_number=generate_order_number(),
@@ -127,25 +198,111 @@ async def create_order(
         )
         db.add(item)
     
-    await db.commit()
-    
-    # Refresh with items
+    await record_order_created(db, order)
+    await record_order_sales(
+        db,
+        order,
+        [(item.product_id, item.quantity, item.price) for item in order_data.items],
+    )
+    return order, reserved
+
+
+async def _load_order(db: AsyncSession, order_id: int) -> Order:
     result = await db.execute(
         select(Order)
-        .options(selectinload(Order.items))
-        .where(Order.id == order.id)
+        .options(*ORDER_RESPONSE_OPTIONS)
+        .where(Order.id == order_id)
+        .execution_options(populate_existing=True)
     )
     return result.scalar_one()
 
 
+@router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
+async def create_order(
+    order_data: OrderCreate,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER, min_length=1, max_length=255),
+    db: AsyncSession = Depends(get_db),
+):
+    """Create a new order, reserving stock for its items.
+    
+    Responds 409 if any product lacks stock, and 422 if one does not
+    exist; nothing is reserved then.
+    With an `Idempotency-Key` header, a retry carrying the same key and
+    body gets the original response (marked `Idempotent-Replayed: true`)
+    instead of a second order; reusing a key with a different body is a
+    422.
+    """
+    if idempotency_key is None:
+        order, reserved = await _insert_order(db, order_data)
+        await db.commit()
+        stats_cache.invalidate()
+        invalidate_products(reserved)
+        return await _load_order(db, order.id)
+    
+    fingerprint = request_fingerprint(order_data.model_dump(mode="json"))
+    
+    async def create() -> StoredResponse:
+        order, reserved = await _insert_order(db, order_data)
+        # Serialized before the commit so the response is stored with the order
+        body = OrderResponse.model_validate(await _load_order(db, order.id)).model_dump(mode="json")
+        order_idempotency.record(db, idempotency_key, fingerprint, status.HTTP_201_CREATED, body)
+        await db.commit()
+        stats_cache.invalidate()
+        invalidate_products(reserved)
+        return StoredResponse(fingerprint, status.HTTP_201_CREATED, body)
+    
+    try:
+        stored, replayed = await order_idempotency.run(db, idempotency_key, fingerprint, create)
+    except IdempotencyKeyReused:
+        raise HTTPException(
+            status_code=422,
+            detail="Idempotency-Key was already used with a different request body",
+        )
+    headers = {REPLAYED_HEADER: "true"} if replayed else None
+    return JSONResponse(status_code=stored.status_code, content=stored.body, headers=headers)
+
+
+@router.post("/bulk", response_model=BulkOrderResult)
+async def create_orders_bulk(
+    orders: list[dict[str, Any]] = Body(...),
+    chunk_size: int = Query(1000, ge=1, le=5000),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Create many orders at once (marketplace sync).
+    
+    Accepts an array of `OrderCreate` objects. Rows are validated one by
+    one and inserted with multi-row statements, one transaction per
+    `chunk_size` rows; invalid rows are reported by index in `errors`
+    instead of failing the whole batch.
+    """
+    if len(orders) > MAX_BULK_ORDERS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {MAX_BULK_ORDERS} orders per request",
+        )
+    try:
+        return await ingest_orders(db, orders, chunk_size)
+    finally:
+        # Chunks commit one by one, so clear caches even if a later one failed
+        stats_cache.invalidate()
+        invalidate_all_products()
+
+
 @router.patch("/{order_id}", response_model=OrderResponse)
 async def update_order(
     order_id: int,
     order_data: OrderUpdate,
+    expand: Optional[str] = Query(None, description=EXPAND_DESCRIPTION),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
-    """Update an order (status, notes)."""
+    """Update an order (status, notes).
+    
+    Cancelling releases the order's stock; reinstating a cancelled order
+    reserves it again and responds 409 if it is no longer available.
+    """
+    expansions = parse_expand(expand, ORDER_EXPANSIONS)
     result = await db.execute(
         select(Order)
         .options(selectinload(Order.items))
@@ -155,10 +312,29 @@ async def update_order(
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     
+    old_status = order.status
     update_data = order_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(order, field, value)
     
+    try:
+        restocked = await record_order_stock_status_change(db, order, old_status)
+    except UnknownProductsError as e:
+        await db.rollback()
+        raise HTTPException(status_code=422, detail=str(e))
+    except InsufficientStockError as e:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    await record_order_status_change(db, order, old_status)
+    await record_order_sales_status_change(db, order, old_status)
     await db.commit()
-    await db.refresh(order)
-    return order
+    stats_cache.invalidate()
+    invalidate_products(restocked)
+    
+    result = await db.execute(
+        select(Order)
+        .options(*order_load_options(expansions))
+        .where(Order.id == order_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one()
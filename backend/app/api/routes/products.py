@@ -1,197 +1,326 @@
-import re
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from app.core.database import get_db
-from app.core.security import get_current_user
-from app.models import Product, User, Category
-from app.schemas import ProductCreate, ProductResponse, ProductUpdate, PaginatedResponse
+from app.core.database import get_db, get_read_db
+from app.core.export import ExportFormat, stream_export
+from app.core.feeds import read_feed
+from app.core.http_cache import conditional_json_response, render_json
+from app.core.pagination import apply_keyset, page_headers, split_page
+from app.core.security import Principal, get_current_user
+from app.models import Product, Category
+from app.schemas import BulkUpsertResult, ProductCreate, ProductFacets, ProductResponse, ProductSuggestion, ProductUpdate
+from app.services.catalog import (
+    CATALOG_CACHE_CONTROL,
+    catalog_cache,
+    invalidate_all_products,
+    invalidate_product,
+    normalize_search,
+)
+from app.services.facets import product_facets
+from app.services.product_import import upsert_products
+from app.services.responses import PRODUCT_SHAPE, product_dicts
+from app.services.search import product_search
+from app.services.slugs import generate_slug, insert_with_unique_slug
+from app.services.suggest import product_suggest
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
 
-def generate_slug(name: str) -> str:
-    """Generate a URL-friendly slug from a product name."""
-    slug = name.lower()
-    slug = re.sub(r'[^a-z0-9\s-]', '', slug)
-    slug = re.sub(r'[\s_-]+', '-', slug)
-    return slug.strip('-')
-
-
-@router.get("/", response_model=list[ProductResponse])
-async def list_products(
-    skip: int = Query(0, ge=0),
-    limit: int = Query(50, ge=1, le=100),
+def apply_product_filters(
+    query,
     category_id: Optional[int] = None,
     is_active: Optional[bool] = None,
     is_featured: Optional[bool] = None,
     search: Optional[str] = None,
-    db: AsyncSession = Depends(get_db),
+    rank: bool = False,
 ):
-    """List all products with optional filtering."""
-    query = select(Product)
-    count_query = select(func.count(Product.id))
+    """Apply the shared listing filters to a product or count query.
     
-    # Apply filters to both queries
+    Search goes through the FTS5 index when it is available; with `rank`
+    the best matches are ordered first. Otherwise it falls back to ILIKE.
+    """
     if category_id is not None:
         query = query.where(Product.category_id == category_id)
-        count_query = count_query.where(Product.category_id == category_id)
     if is_active is not None:
         query = query.where(Product.is_active == is_active)
-        count_query = count_query.where(Product.is_active == is_active)
     if is_featured is not None:
         query = query.where(Product.is_featured == is_featured)
-        count_query = count_query.where(Product.is_featured == is_featured)
     if search:
-        search_lower = f"%{search}%"
-        # Use outerjoin to include products without categories
-        query = query.outerjoin(Category, Product.category_id == Category.id).where(
-            (Product.name.ilike(search_lower)) |
-            (Product.description.ilike(search_lower)) |
-            (Category.name.ilike(search_lower))
-        )
-        count_query = count_query.outerjoin(Category, Product.category_id == Category.id).where(
-            (Product.name.ilike(search_lower)) |
-            (Product.description.ilike(search_lower)) |
-            (Category.name.ilike(search_lower))
-        )
+        match = product_search.match_expression(search) if product_search.enabled else None
+        if match and rank:
+            matches = product_search.ranked_matches(match)
+            query = query.join(matches, matches.c.product_id == Product.id).order_by(matches.c.rank)
+        elif match:
+            query = query.where(Product.id.in_(product_search.matching_ids(match)))
+        else:
+            search_lower = f"%{search}%"
+            # Use outerjoin to include products without categories
+            query = query.outerjoin(Category, Product.category_id == Category.id).where(
+                (Product.name.ilike(search_lower)) |
+                (Product.description.ilike(search_lower)) |
+                (Category.name.ilike(search_lower))
+            )
+    return query
+
+
+@router.get("/", response_model=list[ProductResponse])
+async def list_products(
+    request: Request,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=100),
+    category_id: Optional[int] = None,
+    is_active: Optional[bool] = None,
+    is_featured: Optional[bool] = None,
+    search: Optional[str] = None,
+    cursor: Optional[str] = Query(None, description="Pass empty to start cursor pagination"),
+    include_total: bool = False,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """List all products with optional filtering.
     
-    # Get total count
-    total_result = await db.execute(count_query)
-    total = total_result.scalar() or 0
+    With `cursor` set, pages by (created_at, id) instead of offset and
+    returns the next page's cursor in the `X-Next-Cursor` header.
+    `include_total` adds an `X-Total-Count` header. Responses carry an
+    ETag and answer `If-None-Match` with 304.
+    """
+    search = normalize_search(search)
+    filters = dict(category_id=category_id, is_active=is_active, is_featured=is_featured, search=search)
     
-    # Get paginated results
-    query = query.order_by(Product.created_at.desc()).offset(skip).limit(limit)
-    result = await db.execute(query)
-    products = result.scalars().all()
+    async def load():
+        query = apply_product_filters(select(*PRODUCT_SHAPE.columns), **filters, rank=cursor is None)
+        
+        total = None
+        if include_total:
+            total_result = await db.execute(apply_product_filters(select(func.count(Product.id)), **filters))
+            total = total_result.scalar() or 0
+        
+        next_cursor = None
+        if cursor is not None:
+            result = await db.execute(apply_keyset(query, Product, cursor, limit))
+            rows, next_cursor = split_page(result.all(), limit)
+        else:
+            # Get paginated results
+            query = query.order_by(Product.created_at.desc()).offset(skip).limit(limit)
+            result = await db.execute(query)
+            rows = result.all()
+        return render_json(await product_dicts(db, rows)), page_headers(next_cursor, total)
     
-    return products
+    key = ("products", "list", skip, limit, cursor, include_total, *filters.values())
+    rendered, headers = await catalog_cache.get_or_load(key, load)
+    return conditional_json_response(request, rendered, CATALOG_CACHE_CONTROL, headers)
 
 
 @router.get("/paginated")
 async def list_products_paginated(
+    request: Request,
     page: int = Query(1, ge=1),
     page_size: int = Query(12, ge=1, le=100),
     category_id: Optional[int] = None,
     is_active: Optional[bool] = None,
     is_featured: Optional[bool] = None,
     search: Optional[str] = None,
-    db: AsyncSession = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Pass empty to start cursor pagination"),
+    include_total: bool = False,
+    db: AsyncSession = Depends(get_read_db),
 ):
-    """List products with pagination metadata."""
-    skip = (page - 1) * page_size
-    
-    # Build base query
-    query = select(Product)
-    count_query = select(func.count(Product.id))
-    
-    # Apply filters to both queries
-    if category_id is not None:
-        query = query.where(Product.category_id == category_id)
-        count_query = count_query.where(Product.category_id == category_id)
-    if is_active is not None:
-        query = query.where(Product.is_active == is_active)
-        count_query = count_query.where(Product.is_active == is_active)
-    if is_featured is not None:
-        query = query.where(Product.is_featured == is_featured)
-        count_query = count_query.where(Product.is_featured == is_featured)
-    if search:
-        search_lower = f"%{search}%"
-        query = query.outerjoin(Category, Product.category_id == Category.id).where(
-            (Product.name.ilike(search_lower)) |
-            (Product.description.ilike(search_lower)) |
-            (Category.name.ilike(search_lower))
-        )
-        count_query = count_query.outerjoin(Category, Product.category_id == Category.id).where(
-            (Product.name.ilike(search_lower)) |
-            (Product.description.ilike(search_lower)) |
-            (Category.name.ilike(search_lower))
-        )
-    
-    # Get total count
-    total_result = await db.execute(count_query)
-    total = total_result.scalar() or 0
+    """List products with pagination metadata.
     
-    # Get paginated results
-    query = query.order_by(Product.created_at.desc()).offset(skip).limit(page_size)
-    result = await db.execute(query)
-    products = result.scalars().all()
+    With `cursor` set, `page` is ignored and a `CursorPage` is returned;
+    its `total` is only computed when `include_total` is true.
+    """
+    search = normalize_search(search)
+    filters = dict(category_id=category_id, is_active=is_active, is_featured=is_featured, search=search)
     
-    total_pages = (total + page_size - 1) // page_size if total > 0 else 0
+    async def load():
+        query = apply_product_filters(select(*PRODUCT_SHAPE.columns), **filters, rank=cursor is None)
+        count_query = apply_product_filters(select(func.count(Product.id)), **filters)
+        
+        if cursor is not None:
+            total = None
+            if include_total:
+                total_result = await db.execute(count_query)
+                total = total_result.scalar() or 0
+            result = await db.execute(apply_keyset(query, Product, cursor, page_size))
+            rows, next_cursor = split_page(result.all(), page_size)
+            items = await product_dicts(db, rows)
+            return render_json({"items": items, "next_cursor": next_cursor, "total": total})  # CursorPage
+        
+        skip = (page - 1) * page_size
+        
+        # Get total count
+        total_result = await db.execute(count_query)
+        total = total_result.scalar() or 0
+        
+        # Get paginated results
+        query = query.order_by(Product.created_at.desc()).offset(skip).limit(page_size)
+        result = await db.execute(query)
+        items = await product_dicts(db, result.all())
+        
+        total_pages = (total + page_size - 1) // page_size if total > 0 else 0
+        
+        return render_json({  # PaginatedResponse
+            "items": items,
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "total_pages": total_pages,
+        })
     
-    return PaginatedResponse(
-        items=products,
-        total=total,
-        page=page,
-        page_size=page_size,
-        total_pages=total_pages,
-    )
+    key = ("products", "paginated", page, page_size, cursor, include_total, *filters.values())
+    rendered = await catalog_cache.get_or_load(key, load)
+    return conditional_json_response(request, rendered, CATALOG_CACHE_CONTROL)
 
 
 @router.get("/count")
 async def count_products(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get total product count."""
     result = await db.execute(select(func.count(Product.id)))
     return {"count": result.scalar()}
 
 
+@router.get("/facets", response_model=ProductFacets)
+async def get_product_facets(
+    request: Request,
+    category_id: Optional[int] = None,
+    is_active: Optional[bool] = None,
+    is_featured: Optional[bool] = None,
+    search: Optional[str] = None,
+    buckets: int = Query(10, ge=1, le=50, description="Price histogram buckets"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Category, active and featured counts and a price histogram for a product listing.
+    
+    Takes the listing filters; each facet's counts ignore its own filter,
+    so they show what choosing another value would return.
+    """
+    search = normalize_search(search)
+    filters = dict(category_id=category_id, is_active=is_active, is_featured=is_featured)
+    
+    async def load():
+        matched = apply_product_filters(select(Product.id), search=search)
+        return render_json(await product_facets(db, matched, **filters, buckets=buckets))
+    
+    key = ("products", "facets", buckets, *filters.values(), search)
+    rendered = await catalog_cache.get_or_load(key, load)
+    return conditional_json_response(request, rendered, CATALOG_CACHE_CONTROL)
+
+
+@router.get("/suggest", response_model=list[ProductSuggestion])
+async def suggest_products(
+    q: str = Query(..., max_length=100),
+    limit: int = Query(10, ge=1, le=20),
+):
+    """Autocomplete: the best-selling active products whose name words or SKU start with `q`.
+    
+    Served from memory, without a database query.
+    """
+    return product_suggest.suggest(q, limit)
+
+
+@router.get("/export")
+async def export_products(
+    fmt: ExportFormat = Query(ExportFormat.ndjson, alias="format"),
+    category_id: Optional[int] = None,
+    is_active: Optional[bool] = None,
+    is_featured: Optional[bool] = None,
+    search: Optional[str] = None,
+    current_user: Principal = Depends(get_current_user),
+):
+    """Stream every matching product as NDJSON or CSV, oldest first."""
+    query = apply_product_filters(
+        select(*Product.__table__.columns),
+        category_id=category_id,
+        is_active=is_active,
+        is_featured=is_featured,
+        search=search,
+    )
+    return stream_export(query.order_by(Product.id), fmt, "products")
+
+
 @router.get("/{product_id}", response_model=ProductResponse)
 async def get_product(
     product_id: int,
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get a single product by ID."""
-    result = await db.execute(select(Product).where(Product.id == product_id))
-    product = result.scalar_one_or_none()
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-    return product
+    async def load():
+        result = await db.execute(
+            select(Product)
+            .options(selectinload(Product.category))
+            .where(Product.id == product_id)
+        )
+        product = result.scalar_one_or_none()
+        if not product:
+            raise HTTPException(status_code=404, detail="Product not found")
+        return render_json(ProductResponse.model_validate(product))
+    
+    rendered = await catalog_cache.get_or_load(("product", product_id), load)
+    return conditional_json_response(request, rendered, CATALOG_CACHE_CONTROL)
 
 
 @router.post("/", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
 async def create_product(
     product_data: ProductCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
-    """Create a new product."""
-    # Generate slug if not provided
-    slug = product_data.slug or generate_slug(product_data.name)
-    
-    # Check if slug already exists
-    result = await db.execute(select(Product).where(Product.slug == slug))
-    if result.scalar_one_or_none():
-        # Append a number to make it unique
-        base_slug = slug
-        counter = 1
-        while True:
-            slug = f"{base_slug}-{counter}"
-            result = await db.execute(select(Product).where(Product.slug == slug))
-            if not result.scalar_one_or_none():
-                break
-            counter += 1
-    
-    product = Product(
-        **product_data.model_dump(exclude={"slug"}),
-        slug=slug,
-    )
-    db.add(product)
+    """Create a new product.
+    
+    A taken slug gets the lowest free numeric suffix (`ceramic-mug-2`).
+    """
+    base_slug = product_data.slug or generate_slug(product_data.name)
+    fields = product_data.model_dump(exclude={"slug"})
+    product = await insert_with_unique_slug(db, base_slug, lambda slug: Product(**fields, slug=slug))
     await db.commit()
-    await db.refresh(product)
+    invalidate_product(product.id)
+    product_suggest.add(product)
+    await db.refresh(product, ["category"])
     return product
 
 
+@router.post("/bulk-upsert", response_model=BulkUpsertResult)
+async def bulk_upsert_products(
+    request: Request,
+    fmt: Optional[ExportFormat] = Query(None, alias="format"),
+    chunk_size: int = Query(1000, ge=1, le=5000),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Create or update products from an NDJSON or CSV feed, matched on SKU.
+    
+    The format defaults to CSV for a `text/csv` body and NDJSON otherwise.
+    """
+    if fmt is None:
+        content_type = request.headers.get("content-type", "")
+        fmt = ExportFormat.csv if content_type.startswith("text/csv") else ExportFormat.ndjson
+    
+    # Chunks commit one by one, so a feed that fails part way has still changed products
+    changed = True
+    try:
+        result = await upsert_products(db, read_feed(request.stream(), fmt), chunk_size)
+        changed = bool(result.created or result.updated)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        if changed:
+            invalidate_all_products()
+            product_suggest.invalidate()
+    return result
+
+
 @router.patch("/{product_id}", response_model=ProductResponse)
 async def update_product(
     product_id: int,
     product_data: ProductUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Update a product."""
     result = await db.execute(select(Product).where(Product.id == product_id))
@@ -204,7 +333,9 @@ async def update_product(
         setattr(product, field, value)
     
     await db.commit()
-    await db.refresh(product)
+    invalidate_product(product_id)
+    product_suggest.add(product)
+    await db.refresh(product, ["category"])
     return product
 
 
@@ -212,7 +343,7 @@ async def update_product(
 async def delete_product(
     product_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """Delete a product."""
     result = await db.execute(select(Product).where(Product.id == product_id))
@@ -222,3 +353,5 @@ async def delete_product(
     
     await db.delete(product)
     await db.commit()
+    invalidate_product(product_id)
+    product_suggest.remove(product_id)
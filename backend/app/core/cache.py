@@ -0,0 +1,84 @@
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+MISSING = object()
+
+
+class TTLCache:
+    """Small in-process LRU cache whose entries also expire after `ttl` seconds.
+
+    Keys are tuples whose first element is a namespace, so related entries
+    can be dropped together with `invalidate_namespace`. Every invalidation
+    bumps a generation counter; `get_or_load` does not store a value whose
+    load started before an invalidation, so a slow read cannot put stale
+    data back after a write.
+
+    The cache is per process: with several workers, the TTL bounds how long
+    another worker can serve data changed elsewhere.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Any:
+        """Return the cached value or `MISSING`, refreshing its LRU position."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return MISSING
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        value = self.get(key)
+        if value is not MISSING:
+            return value
+        generation = self._generation
+        value = await loader()
+        if generation == self._generation:
+            self.set(key, value)
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        self._generation += 1
+        self._entries.pop(key, None)
+
+    def invalidate_namespace(self, namespace: str) -> None:
+        self._generation += 1
+        for key in [key for key in self._entries if key[0] == namespace]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+        }
@@ -10,14 +10,50 @@ class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = "sqlite+aiosqlite:///./nexusstore.db"
     
+    # SQLite tuning, applied on every new connection when SQLITE_TUNING is on
+    SQLITE_TUNING: bool = True
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_CACHE_SIZE: int = -64 * 1024  # Negative = KiB per connection
+    SQLITE_TEMP_STORE: str = "MEMORY"
+    # Read-only connection pool for GET routes plus a single writer connection
+    DB_SPLIT_READ_WRITE: bool = False
+    DB_READ_POOL_SIZE: int = 8
+    
+    # SQL logging (independent of DEBUG)
+    DB_ECHO: bool = False  # SQLAlchemy echo of every statement; development only
+    QUERY_LOG_SAMPLE_RATE: float = 0.0  # Fraction of statements logged as JSON
+    QUERY_LOG_SLOW_MS: float = 200.0  # Always log statements at least this slow; 0 = off
+    QUERY_LOG_PARAMETERS: bool = False  # Include bound parameters in query logs
+    QUERY_LOG_REQUEST_MAX_STATEMENTS: int = 100  # Log requests running more; 0 = off
+    
     # JWT Settings
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 30.0  # 0 looks the user up on every request
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 4096
+    
+    # Password hashing (bcrypt runs on a thread pool)
+    PASSWORD_HASH_WORKERS: int = 0  # 0 = one per CPU core
+    PASSWORD_HASH_MAX_QUEUE: int = 256  # Waiting calls before 503; 0 = unbounded
     
     # CORS
     FRONTEND_URL: str = "http://localhost:3000"
     
+    # Caching
+    STATS_CACHE_TTL_SECONDS: float = 5.0  # 0 disables the dashboard stats snapshot
+    CATALOG_CACHE_TTL_SECONDS: float = 60.0  # 0 disables the storefront catalog cache
+    CATALOG_CACHE_MAX_ENTRIES: int = 1024
+    CATALOG_HTTP_MAX_AGE: int = 30  # Cache-Control max-age for public catalog GETs
+    SUGGEST_REFRESH_SECONDS: float = 300.0  # Background rebuild of the suggest index; 0 = startup only
+    
+    # Idempotency-Key replay window for POST /api/orders/
+    IDEMPOTENCY_TTL_SECONDS: float = 24 * 60 * 60
+    IDEMPOTENCY_CACHE_MAX_ENTRIES: int = 10000  # Recent keys also kept in memory
+    
     class Config:
         env_file = ".env"
 
@@ -1,17 +1,85 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 
 from app.core.config import settings
+from app.core.query_log import install_query_logging
 
 
 class Base(DeclarativeBase):
     pass
 
 
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=settings.DEBUG,
-)
+def _sqlite_pragmas(read_only: bool) -> list[str]:
+    pragmas = [
+        f"busy_timeout = {int(settings.SQLITE_BUSY_TIMEOUT_MS)}",
+        f"mmap_size = {int(settings.SQLITE_MMAP_SIZE)}",
+        f"cache_size = {int(settings.SQLITE_CACHE_SIZE)}",
+        f"temp_store = {settings.SQLITE_TEMP_STORE}",
+    ]
+    if not read_only:
+        # Journal mode is persistent and can only be changed by a writer
+        pragmas[:0] = [
+            f"journal_mode = {settings.SQLITE_JOURNAL_MODE}",
+            f"synchronous = {settings.SQLITE_SYNCHRONOUS}",
+        ]
+    return pragmas
+
+
+def _apply_sqlite_tuning(async_engine: AsyncEngine, read_only: bool = False) -> None:
+    pragmas = _sqlite_pragmas(read_only)
+
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(f"PRAGMA {pragma}")
+        cursor.close()
+
+
+def _is_file_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def _create_engines() -> tuple[AsyncEngine, AsyncEngine]:
+    """Build the writer engine and the engine GET routes read from.
+
+    Without DB_SPLIT_READ_WRITE (or on non-file databases) both are the
+    same engine. With it, SQLite writes go through a single pooled
+    connection, so they queue in-process instead of failing with
+    "database is locked", while reads use a pool of read-only connections
+    that WAL lets run alongside the writer.
+    """
+    url = make_url(settings.DATABASE_URL)
+    split = settings.DB_SPLIT_READ_WRITE and _is_file_sqlite(url)
+
+    writer_kwargs = {"pool_size": 1, "max_overflow": 0} if split else {}
+    writer = create_async_engine(url, echo=settings.DB_ECHO, **writer_kwargs)
+    install_query_logging(writer)
+    if settings.SQLITE_TUNING and _is_file_sqlite(url):
+        _apply_sqlite_tuning(writer)
+    if not split:
+        return writer, writer
+
+    read_url = url.set(
+        database=f"file:{url.database}",
+        query={**url.query, "mode": "ro", "uri": "true"},
+    )
+    reader = create_async_engine(
+        read_url,
+        echo=settings.DB_ECHO,
+        pool_size=settings.DB_READ_POOL_SIZE,
+        max_overflow=0,
+    )
+    install_query_logging(reader)
+    if settings.SQLITE_TUNING:
+        _apply_sqlite_tuning(reader, read_only=True)
+    return writer, reader
+
+
+engine, read_engine = _create_engines()
 
 async_session_maker = async_sessionmaker(
     engine,
@@ -19,6 +87,19 @@ async_session_maker = async_sessionmaker(
     expire_on_commit=False,
 )
 
+read_session_maker = async_sessionmaker(
+    read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+)
+
+
+def dialect_insert(session: AsyncSession, table):
+    """Return an INSERT for the session's dialect that supports ON CONFLICT."""
+    if session.bind.dialect.name == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
+
 
 async def get_db():
     async with async_session_maker() as session:
@@ -28,6 +109,15 @@ async def get_db():
             await session.close()
 
 
+async def get_read_db():
+    """Session for read-only routes; uses the read pool when one is configured."""
+    async with read_session_maker() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
 async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
@@ -0,0 +1,147 @@
+import codecs
+import csv
+from collections import deque
+from typing import Any, AsyncIterator, Optional
+
+import orjson
+
+from app.core.export import ExportFormat
+
+# (index, record, error): index counts records from 0 (the CSV header is not
+# one); exactly one of record and error is set
+FeedRecord = tuple[int, Optional[Any], Optional[str]]
+
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a UTF-8 byte stream and yield its lines without line endings."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending = ""
+    first = True
+    async for chunk in chunks:
+        text = pending + decoder.decode(chunk)
+        if first and text:
+            text = text.removeprefix("\ufeff")  # Spreadsheet exports start with a BOM
+            first = False
+        *lines, pending = text.split("\n")
+        for line in lines:
+            yield line.removesuffix("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.removesuffix("\r")
+
+
+async def read_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[FeedRecord]:
+    """One JSON object per line; blank lines are skipped."""
+    index = 0
+    async for line in _lines(chunks):
+        if not line.strip():
+            continue
+        try:
+            record = orjson.loads(line)
+        except orjson.JSONDecodeError as e:
+            yield index, None, f"Invalid JSON: {e}"
+        else:
+            if isinstance(record, dict):
+                yield index, record, None
+            else:
+                yield index, None, "Expected a JSON object"
+        index += 1
+
+
+class _NeedMore(Exception):
+    """The CSV reader asked for a line that has not arrived yet."""
+
+
+class _LineFeed:
+    """Lines for `csv.reader`, handed over as the body streams in.
+
+    The reader restarts a record from scratch on every call, so when it
+    runs out of lines part way, the lines it took are put back to be
+    read again once more have arrived.
+    """
+
+    def __init__(self):
+        self.pending: deque[str] = deque()
+        self.taken: list[str] = []
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.pending:
+            if self.closed:
+                raise StopIteration
+            raise _NeedMore
+        line = self.pending.popleft()
+        self.taken.append(line)
+        return line
+
+    def give_back(self) -> None:
+        self.pending.extendleft(reversed(self.taken))
+
+
+async def _csv_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[Optional[list[str]], Optional[str]]]:
+    """Parse CSV rows with one `csv.reader`, yielding (row, None) or (None, error).
+
+    Quoting is left to the csv module, so a field may span lines and a
+    stray quote in an unquoted field (`27" Monitor`) is read as a literal
+    character, as `csv` does for files. Blank lines are skipped.
+    """
+    feed = _LineFeed()
+    reader = csv.reader(feed)
+    wanted = 1  # Lines to wait for before parsing again; doubles while a record stays incomplete
+
+    def parse():
+        nonlocal wanted
+        while feed.pending:
+            feed.taken.clear()
+            try:
+                row = next(reader)
+            except _NeedMore:
+                feed.give_back()
+                wanted = 2 * len(feed.pending)
+                return
+            except StopIteration:
+                return
+            except csv.Error as e:
+                yield None, str(e)
+            else:
+                if any(cell.strip() for cell in row):
+                    yield row, None
+            wanted = 1
+
+    async for line in _lines(chunks):
+        feed.pending.append(line + "\n")  # The reader keeps line breaks inside quoted fields
+        if len(feed.pending) >= wanted:
+            for item in parse():
+                yield item
+    feed.closed = True
+    for item in parse():
+        yield item
+
+
+async def read_csv(chunks: AsyncIterator[bytes]) -> AsyncIterator[FeedRecord]:
+    """CSV with a header row; empty cells are left out of the record."""
+    header = None
+    index = 0
+    async for row, error in _csv_rows(chunks):
+        if header is None:
+            if error is not None:
+                raise ValueError(f"Invalid CSV header: {error}")
+            header = [name.strip() for name in row]
+            continue
+        if error is not None:
+            yield index, None, f"Invalid CSV: {error}"
+        elif len(row) != len(header):
+            yield index, None, f"Expected {len(header)} fields, got {len(row)}"
+        else:
+            yield index, {name: value for name, value in zip(header, row) if value != ""}, None
+        index += 1
+
+
+def read_feed(chunks: AsyncIterator[bytes], fmt: ExportFormat) -> AsyncIterator[FeedRecord]:
+    """Parse a streamed NDJSON or CSV body (the formats `stream_export` writes) record by record."""
+    if fmt == ExportFormat.csv:
+        return read_csv(chunks)
+    return read_ndjson(chunks)
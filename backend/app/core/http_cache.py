@@ -0,0 +1,89 @@
+import hashlib
+from typing import Any, Callable, Optional
+
+import orjson
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+
+def _orjson_default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    return jsonable_encoder(value)
+
+
+def dump_json(content: Any) -> bytes:
+    """Serialize with orjson; pydantic models and other types go through FastAPI's encoder.
+
+    Plain dicts, lists, strings, numbers and datetimes are written natively,
+    producing the same JSON as pydantic would for a response model.
+    """
+    return orjson.dumps(content, default=_orjson_default)
+
+
+class FastJSONResponse(Response):
+    """JSON response rendered with orjson, for bodies built as plain dicts.
+
+    Returning it from an endpoint skips response_model validation, so the
+    body must already match the declared schema (see `app.core.rows`).
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dump_json(content)
+
+
+class RenderedJSON:
+    """A serialized JSON body with a strong ETag derived from its content."""
+
+    __slots__ = ("body", "etag")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def render_json(content: Any) -> RenderedJSON:
+    """Serialize once, so the body and its ETag can be cached."""
+    return RenderedJSON(dump_json(content))
+
+
+class LastRendered:
+    """Reuse the rendered body for as long as the source object is the same one."""
+
+    def __init__(self):
+        self._source: Any = None
+        self._rendered: Optional[RenderedJSON] = None
+
+    def get(self, source: Any, build: Callable[[], Any]) -> RenderedJSON:
+        if source is not self._source or self._rendered is None:
+            self._rendered = render_json(build())
+            self._source = source
+        return self._rendered
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison, as RFC 9110 requires for If-None-Match."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        tag.strip().removeprefix("W/") == etag
+        for tag in if_none_match.split(",")
+    )
+
+
+def conditional_json_response(
+    request: Request,
+    rendered: RenderedJSON,
+    cache_control: str,
+    headers: Optional[dict[str, str]] = None,
+) -> Response:
+    """Return 304 when the client already has this body, else the cached bytes."""
+    headers = {"ETag": rendered.etag, "Cache-Control": cache_control, **(headers or {})}
+    if etag_matches(request.headers.get("if-none-match"), rendered.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=rendered.body, media_type="application/json", headers=headers)
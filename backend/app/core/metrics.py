@@ -0,0 +1,229 @@
+import time
+from bisect import bisect_left
+
+from app.core.query_log import begin_request, end_request
+
+# Histogram bucket upper bounds (the +Inf bucket is implicit)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_TIME_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+DB_STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Route label for requests that matched no route, so 404 scans cannot
+# create unbounded label sets
+UNMATCHED_ROUTE = "<unmatched>"
+
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Fixed-bucket histogram; `observe` is one bisect and two additions.
+
+    Counts are kept per bucket (not cumulative) and only accumulated when
+    rendered, so nothing on the request path takes a lock: all updates
+    happen on the event loop thread.
+    """
+
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def render(self, name: str, labels: str) -> list[str]:
+        prefix = f"{labels}," if labels else ""
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{prefix}le="{_format_value(bound)}"}} {cumulative}')
+        cumulative += self.counts[-1]
+        lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {cumulative}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {_format_value(self.sum)}")
+        lines.append(f"{name}_count{suffix} {cumulative}")
+        return lines
+
+
+class RouteSeries:
+    """All series for one (method, route) pair, with its label string built once."""
+
+    __slots__ = ("labels", "latency", "db_time", "db_statements", "response_size", "responses")
+
+    def __init__(self, method: str, route: str):
+        self.labels = f'method="{_escape(method)}",route="{_escape(route)}"'
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.db_time = Histogram(DB_TIME_BUCKETS)
+        self.db_statements = Histogram(DB_STATEMENT_BUCKETS)
+        self.response_size = Histogram(SIZE_BUCKETS)
+        self.responses: dict[int, int] = {}
+
+
+def _route_template(scope) -> str:
+    """Return the full path template of the route that served the request.
+
+    Routes from included routers may report their path without the outer
+    router's prefix, so the prefix is recovered from the concrete request
+    path.
+    """
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    if path is None:
+        return UNMATCHED_ROUTE
+    try:
+        concrete = path.format(**scope.get("path_params", {}))
+    except (KeyError, IndexError, ValueError):
+        return path
+    request_path = scope["path"]
+    if request_path.endswith(concrete):
+        return request_path[:len(request_path) - len(concrete)] + path
+    return path
+
+
+class RequestMetrics:
+    """In-process registry behind `/metrics`.
+
+    Series are created the first time a (method, route) pair is seen and
+    looked up by tuple afterwards; the route is the path template, never
+    the raw URL, so cardinality is bounded by the number of routes.
+    """
+
+    def __init__(self):
+        self.series: dict[tuple[str, str], RouteSeries] = {}
+        self.route_templates: dict[int, str] = {}
+        self.in_flight = 0
+        self.db_statements_total = 0
+        self.db_time_total = 0.0
+
+    def route_series(self, method: str, route: str) -> RouteSeries:
+        series = self.series.get((method, route))
+        if series is None:
+            series = self.series[(method, route)] = RouteSeries(method, route)
+        return series
+
+    def route_template(self, scope) -> str:
+        route = scope.get("route")
+        template = self.route_templates.get(id(route))
+        if template is None:
+            template = _route_template(scope)
+            if route is not None:
+                self.route_templates[id(route)] = template
+        return template
+
+    def observe(
+        self,
+        method: str,
+        route: str,
+        status: int,
+        duration: float,
+        size: int,
+        statements: int,
+        db_time: float,
+    ) -> None:
+        series = self.route_series(method, route)
+        series.latency.observe(duration)
+        series.response_size.observe(size)
+        series.db_statements.observe(statements)
+        series.db_time.observe(db_time)
+        series.responses[status] = series.responses.get(status, 0) + 1
+        self.db_statements_total += statements
+        self.db_time_total += db_time
+
+    def render(self) -> str:
+        series = list(self.series.values())
+        lines = [
+            "# HELP http_requests_in_flight Requests currently being served.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+            "# HELP http_responses_total Responses sent, by route and status code.",
+            "# TYPE http_responses_total counter",
+        ]
+        for s in series:
+            for status, count in sorted(s.responses.items()):
+                lines.append(f'http_responses_total{{{s.labels},status="{status}"}} {count}')
+
+        histograms = (
+            ("http_request_duration_seconds", "Time to serve a request, including streaming the body.", "latency"),
+            ("http_response_size_bytes", "Response body size.", "response_size"),
+            ("http_request_db_statements", "SQL statements executed per request.", "db_statements"),
+            ("http_request_db_seconds", "Time spent executing SQL per request.", "db_time"),
+        )
+        for name, help_text, attribute in histograms:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for s in series:
+                lines.extend(getattr(s, attribute).render(name, s.labels))
+
+        lines += [
+            "# HELP db_statements_total SQL statements executed while serving requests.",
+            "# TYPE db_statements_total counter",
+            f"db_statements_total {self.db_statements_total}",
+            "# HELP db_seconds_total Time spent executing SQL while serving requests.",
+            "# TYPE db_seconds_total counter",
+            f"db_seconds_total {_format_value(self.db_time_total)}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+request_metrics = RequestMetrics()
+
+
+class InstrumentationMiddleware:
+    """ASGI middleware that records per-request metrics and query stats.
+
+    Latency covers the whole exchange, including streamed bodies. The
+    route label is read from the matched route after the app has run.
+    """
+
+    def __init__(self, app, metrics: RequestMetrics = request_metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = self.metrics
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        stats, token = begin_request(scope["method"], scope["path"])
+        metrics.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            metrics.in_flight -= 1
+            end_request(stats, token)
+            metrics.observe(
+                scope["method"],
+                metrics.route_template(scope),
+                status,
+                duration,
+                size,
+                stats.statements,
+                stats.duration,
+            )
@@ -0,0 +1,65 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException, Response
+from sqlalchemy import and_, or_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Encode a (created_at, id) seek key as an opaque URL-safe token."""
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def apply_keyset(query, model, cursor: Optional[str], limit: int):
+    """Order newest first by (created_at, id) and seek past `cursor`.
+
+    An empty cursor starts from the first page. One extra row is fetched so
+    `split_page` can tell whether another page exists without a COUNT.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.where(
+            or_(
+                model.created_at < created_at,
+                and_(model.created_at == created_at, model.id < row_id),
+            )
+        )
+    return query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+
+
+def split_page(rows, limit: int) -> tuple[list, Optional[str]]:
+    """Trim the look-ahead row and build the cursor for the next page."""
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.created_at, last.id)
+
+
+def page_headers(next_cursor: Optional[str] = None, total: Optional[int] = None) -> dict[str, str]:
+    headers = {}
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    if total is not None:
+        headers[TOTAL_COUNT_HEADER] = str(total)
+    return headers
+
+
+def set_page_headers(response: Response, next_cursor: Optional[str] = None, total: Optional[int] = None) -> None:
+    response.headers.update(page_headers(next_cursor, total))
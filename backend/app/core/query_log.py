@@ -0,0 +1,140 @@
+import json
+import logging
+import random
+import sys
+import time
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.sql")
+
+# Longest statement text written to a log line
+MAX_STATEMENT_CHARS = 1000
+
+
+@dataclass
+class QueryStats:
+    """Statements run and time spent in the database for one request."""
+
+    method: str
+    path: str
+    statements: int = 0
+    duration: float = 0.0
+
+
+_request_stats: ContextVar[Optional[QueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """Return the stats of the request being served, if any."""
+    return _request_stats.get()
+
+
+def _emit(level: int, record: dict) -> None:
+    logger.log(level, json.dumps(record, default=str, separators=(",", ":")))
+
+
+def _statement_record(
+    statement: str,
+    parameters,
+    duration: float,
+    executemany: bool,
+    stats: Optional[QueryStats],
+) -> dict:
+    record = {
+        "event": "query",
+        "duration_ms": round(duration * 1000, 3),
+        "statement": " ".join(statement.split())[:MAX_STATEMENT_CHARS],
+        "executemany": executemany,
+    }
+    if settings.QUERY_LOG_PARAMETERS:
+        record["parameters"] = parameters
+    if stats is not None:
+        record.update(method=stats.method, path=stats.path, request_statement=stats.statements)
+    return record
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["query_start"].pop()
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.duration += duration
+
+    slow_ms = settings.QUERY_LOG_SLOW_MS
+    if slow_ms > 0 and duration * 1000 >= slow_ms:
+        record = _statement_record(statement, parameters, duration, executemany, stats)
+        record["slow"] = True
+        _emit(logging.WARNING, record)
+    elif settings.QUERY_LOG_SAMPLE_RATE > 0 and random.random() < settings.QUERY_LOG_SAMPLE_RATE:
+        _emit(logging.INFO, _statement_record(statement, parameters, duration, executemany, stats))
+
+
+def _handle_error(exception_context):
+    start = exception_context.connection.info.get("query_start") if exception_context.connection else None
+    duration = time.perf_counter() - start.pop() if start else 0.0
+    record = _statement_record(
+        exception_context.statement or "",
+        exception_context.parameters,
+        duration,
+        bool(exception_context.execution_context and exception_context.execution_context.executemany),
+        _request_stats.get(),
+    )
+    record["error"] = repr(exception_context.original_exception)
+    _emit(logging.ERROR, record)
+
+
+def _configure_logger() -> None:
+    if logger.handlers:
+        return
+    # Each record is already a JSON document; write it as-is on its own line
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def install_query_logging(async_engine: AsyncEngine) -> None:
+    """Time every statement on the engine and log a sample of them as JSON.
+
+    Statements slower than QUERY_LOG_SLOW_MS and failed statements are
+    always logged; the rest are logged with probability
+    QUERY_LOG_SAMPLE_RATE. Counts and durations are also added to the
+    current request's `QueryStats`.
+    """
+    _configure_logger()
+    sync_engine = async_engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+def begin_request(method: str, path: str) -> tuple[QueryStats, Token]:
+    """Start counting statements for a request served in the current context."""
+    stats = QueryStats(method=method, path=path)
+    return stats, _request_stats.set(stats)
+
+
+def end_request(stats: QueryStats, token: Token) -> None:
+    """Stop counting for a request, reporting it if it ran too many statements."""
+    _request_stats.reset(token)
+    limit = settings.QUERY_LOG_REQUEST_MAX_STATEMENTS
+    if limit > 0 and stats.statements > limit:
+        _emit(logging.WARNING, {
+            "event": "request",
+            "method": stats.method,
+            "path": stats.path,
+            "statements": stats.statements,
+            "db_ms": round(stats.duration * 1000, 3),
+        })
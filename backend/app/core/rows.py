@@ -0,0 +1,40 @@
+from typing import Any, Sequence
+
+
+class RowShape:
+    """Builds a response schema's dict straight from selected columns.
+
+    `columns` are the table columns of `model` that `schema` serializes,
+    in the schema's field order; select them (positionally, possibly next
+    to other columns) and pass the values to `build` along with the
+    related objects named in `relations`. The result serializes to the
+    same JSON as `schema.model_validate(obj)`, without loading ORM objects
+    or validating attribute by attribute, so only use it for columns whose
+    stored values already have the schema's types.
+    """
+
+    def __init__(self, model, schema, relations: Sequence[str] = ()):
+        table = model.__table__
+        fields = list(schema.model_fields)
+        scalar_fields = [name for name in fields if name not in relations]
+        unknown = [name for name in scalar_fields if name not in table.c]
+        if unknown:
+            raise ValueError(f"{schema.__name__} fields are not {table.name} columns: {unknown}")
+        # Relations go last so dicts keep the schema's key order
+        if fields != scalar_fields + list(relations):
+            raise ValueError(f"{schema.__name__} relations must be its last fields, in order")
+        self.columns = tuple(table.c[name] for name in scalar_fields)
+        # The same columns as mapped attributes, for load_only()
+        self.attributes = tuple(getattr(model, name) for name in scalar_fields)
+        self.keys = tuple(scalar_fields)
+        self.relations = tuple(relations)
+
+    @property
+    def width(self) -> int:
+        return len(self.columns)
+
+    def build(self, values: Sequence[Any], *related: Any) -> dict:
+        """`values` in `columns` order, then one object per relation."""
+        data = dict(zip(self.keys, values))
+        data.update(zip(self.relations, related))
+        return data
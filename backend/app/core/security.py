@@ -1,15 +1,22 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Callable, Optional
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy import select
+from sqlalchemy import event, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
+from app.core.cache import MISSING, TTLCache
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import get_read_db
 from app.models import User
 from app.schemas import TokenData
 
@@ -25,6 +32,74 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+class PasswordHashPool:
+    """Runs bcrypt on a bounded thread pool so it never blocks the event loop.
+
+    bcrypt releases the GIL while hashing, so throughput scales with the
+    number of workers up to the core count. When more than `max_queue`
+    calls are already waiting for a worker, new ones are rejected with 503
+    instead of piling up behind a login burst.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self.peak_queue_depth = 0
+        self.completed = 0
+        self.rejected = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Calls submitted but still waiting for a free worker."""
+        return max(0, self._pending - self.workers)
+
+    async def run(self, fn: Callable, *args):
+        if self.max_queue and self.queue_depth >= self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication is busy, please retry",
+                headers={"Retry-After": "1"},
+            )
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+
+        self._pending += 1
+        self.peak_queue_depth = max(self.peak_queue_depth, self.queue_depth)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._pending -= 1
+            self.completed += 1
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "in_flight": min(self._pending, self.workers),
+            "queue_depth": self.queue_depth,
+            "peak_queue_depth": self.peak_queue_depth,
+            "max_queue": self.max_queue,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+password_pool = PasswordHashPool(
+    workers=settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_pool.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_pool.run(get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -36,29 +111,89 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated user as seen by route dependencies."""
+    id: int
+    email: str
+    role: str
+    is_active: bool
+
+
+# Principals by token subject (email); short TTL plus explicit invalidation
+principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+# Verified tokens -> (subject, exp); entries are never used past `exp`
+token_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
+
+
+def invalidate_principal(email: str) -> None:
+    principal_cache.invalidate(("principal", email))
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _queue_principal_invalidation(mapper, connection, target):
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault("changed_principals", set()).add(target.email)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_principals(session):
+    for email in session.info.pop("changed_principals", ()):
+        invalidate_principal(email)
+
+
+def decode_token_subject(token: str) -> Optional[str]:
+    """Return the token's `sub`, memoizing the signature check until `exp`."""
+    cached = token_cache.get(("token", token))
+    if cached is not MISSING:
+        subject, expires_at = cached
+        if expires_at > time.time():
+            return subject
+        raise JWTError("Signature has expired")
+
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    subject = payload.get("sub")
+    if subject is not None and payload.get("exp") is not None:
+        token_cache.set(("token", token), (subject, payload["exp"]))
+    return subject
+
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: AsyncSession = Depends(get_db),
-) -> User:
+    db: AsyncSession = Depends(get_read_db),
+) -> Principal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
+        email = decode_token_subject(token)
         if email is None:
             raise credentials_exception
         token_data = TokenData(email=email)
     except JWTError:
         raise credentials_exception
     
-    result = await db.execute(select(User).where(User.email == token_data.email))
-    user = result.scalar_one_or_none()
+    async def load():
+        result = await db.execute(
+            select(User.id, User.email, User.role, User.is_active)
+            .where(User.email == token_data.email)
+        )
+        row = result.one_or_none()
+        if row is None:
+            raise credentials_exception
+        return Principal(id=row.id, email=row.email, role=row.role, is_active=row.is_active)
     
-    if user is None:
-        raise credentials_exception
+    user = await principal_cache.get_or_load(("principal", token_data.email), load)
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return user
@@ -70,6 +205,6 @@ async def authenticate_user(db: AsyncSession, email: str, password: str) -> Opti
     
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_async(password, user.hashed_password):
         return None
     return user
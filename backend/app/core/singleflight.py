@@ -0,0 +1,86 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+from app.core.metrics import _escape
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Runs one computation per key at a time and shares its result.
+
+    A call made while an identical one (same `name` and `key`) is still
+    running awaits that call instead of starting its own, so a burst of
+    dashboard requests costs one query. Results are not kept once the
+    call finishes; caching is left to the caller. Errors are shared the
+    same way, except cancellation of the running call: its waiters start
+    over rather than fail.
+
+    `name` labels the metrics and must come from a fixed set (a route,
+    not its parameters).
+    """
+
+    def __init__(self):
+        self._calls: dict[tuple, asyncio.Future] = {}
+        self.executions: dict[str, int] = {}
+        self.coalesced: dict[str, int] = {}
+
+    async def do(self, name: str, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        call_key = (name, key)
+        while (future := self._calls.get(call_key)) is not None:
+            self.coalesced[name] = self.coalesced.get(name, 0) + 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                # The running call was cancelled, not us: take over
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[call_key] = future
+        self.executions[name] = self.executions.get(name, 0) + 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Retrieved so an error nobody waited for is not logged as lost
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[call_key]
+
+    def stats(self) -> dict:
+        return {
+            name: {
+                "executions": executions,
+                "coalesced": self.coalesced.get(name, 0),
+                "in_flight": sum(1 for call_name, _ in self._calls if call_name == name),
+            }
+            for name, executions in sorted(self.executions.items())
+        }
+
+    def render(self) -> str:
+        """Prometheus counters, in the same format as `RequestMetrics.render`."""
+        lines = [
+            "# HELP singleflight_executions_total Computations run by the single-flight layer.",
+            "# TYPE singleflight_executions_total counter",
+        ]
+        for name, count in sorted(self.executions.items()):
+            lines.append(f'singleflight_executions_total{{name="{_escape(name)}"}} {count}')
+        lines += [
+            "# HELP singleflight_coalesced_total Calls that shared an identical in-flight computation.",
+            "# TYPE singleflight_coalesced_total counter",
+        ]
+        for name, count in sorted(self.coalesced.items()):
+            lines.append(f'singleflight_coalesced_total{{name="{_escape(name)}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+# Shared by the analytics endpoints and the stats snapshot
+analytics_flight = SingleFlight()
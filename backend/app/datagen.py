@@ -0,0 +1,362 @@
+"""Synthetic catalog, customer and order data for staging and load tests.
+
+Usage:
+    python -m app.datagen --scale small
+    python -m app.datagen --products 100000 --customers 50000 --orders 1000000
+
+Rows are generated deterministically from a seed and written with
+multi-row (executemany) inserts on one connection, one transaction per
+chunk. Secondary indexes and the search triggers are dropped for the
+load and rebuilt once at the end, which is much cheaper than
+maintaining them row by row.
+"""
+import argparse
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+from app.core.config import settings
+from app.core.database import engine, init_db
+from app.models import Category, Customer, Order, OrderItem, Product
+from app.services.product_sales import rebuild_product_sales
+from app.services.revenue import backfill_daily_revenue
+from app.services.search import product_search
+
+
+CATEGORY_NAMES = [
+    "Home Decor", "Textiles", "Storage", "Candles", "Kitchen", "Home Fragrance",
+    "Lighting", "Furniture", "Bath", "Garden", "Tableware", "Stationery",
+    "Wall Art", "Rugs", "Bedding", "Outdoor", "Pet", "Kids", "Gifts", "Office",
+]
+ADJECTIVES = [
+    "Minimalist", "Organic", "Handwoven", "Scented", "Rustic", "Modern", "Vintage",
+    "Nordic", "Artisan", "Classic", "Soft", "Natural", "Elegant", "Compact", "Large",
+]
+MATERIALS = [
+    "Ceramic", "Cotton", "Linen", "Wooden", "Bamboo", "Glass", "Marble", "Rattan",
+    "Wool", "Copper", "Brass", "Leather", "Stoneware", "Oak", "Walnut",
+]
+NOUNS = [
+    "Vase", "Throw Blanket", "Basket", "Candle", "Table Runner", "Serving Board",
+    "Mug Set", "Diffuser", "Lamp", "Bowl", "Planter", "Cushion", "Tray", "Mirror",
+    "Clock", "Shelf", "Jar", "Towel", "Notebook", "Frame",
+]
+FIRST_NAMES = ["Ana", "Luis", "Maria", "John", "Sofia", "Carlos", "Emma", "Noah", "Lucia", "Mateo"]
+LAST_NAMES = ["Garcia", "Smith", "Lopez", "Brown", "Martinez", "Jones", "Perez", "Miller", "Diaz", "Wilson"]
+CITIES = [("Madrid", "Spain"), ("Mexico City", "Mexico"), ("Austin", "USA"), ("Bogota", "Colombia"), ("Lima", "Peru")]
+# Weighted towards completed orders, like a real order history
+STATUS_WEIGHTS = {"delivered": 60, "shipped": 12, "processing": 10, "pending": 10, "cancelled": 8}
+
+
+@dataclass
+class DatasetSize:
+    products: int
+    customers: int
+    orders: int
+    items_per_order: int = 5  # Average; each order gets 1..2n-1 items
+    days: int = 365  # Spread of order and product creation dates
+
+
+SCALES = {
+    "tiny": DatasetSize(products=1_000, customers=500, orders=5_000, items_per_order=3),
+    "small": DatasetSize(products=10_000, customers=5_000, orders=100_000),
+    "medium": DatasetSize(products=50_000, customers=25_000, orders=500_000),
+    "large": DatasetSize(products=100_000, customers=100_000, orders=1_000_000),
+}
+
+LOADED_TABLES = [Category.__table__, Product.__table__, Customer.__table__, Order.__table__, OrderItem.__table__]
+
+
+async def _next_id(conn: AsyncConnection, model) -> int:
+    return ((await conn.execute(select(func.max(model.id)))).scalar() or 0) + 1
+
+
+def _chunks(rows, chunk_size: int):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def _insert_rows(conn: AsyncConnection, table, rows: list[dict]) -> None:
+    """executemany `rows` into `table`.
+
+    On SQLite the rows are bound with the column types' processors and
+    passed straight to the driver, skipping per-row parameter
+    compilation, which otherwise costs more than the insert itself.
+    """
+    if not rows:
+        return
+    if conn.dialect.name != "sqlite":
+        await conn.execute(insert(table), rows)
+        return
+    columns = list(rows[0])
+    processors = [table.c[name].type.dialect_impl(conn.dialect).bind_processor(conn.dialect) for name in columns]
+    if any(processors):
+        params = [
+            tuple(process(row[name]) if process else row[name] for name, process in zip(columns, processors))
+            for row in rows
+        ]
+    else:
+        params = [tuple(row[name] for name in columns) for row in rows]
+    sql = f"INSERT INTO {table.name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    await conn.exec_driver_sql(sql, params)
+
+
+async def _insert_chunked(conn: AsyncConnection, table, rows, chunk_size: int) -> int:
+    """Insert an iterable of row dicts, one transaction per chunk."""
+    count = 0
+    for chunk in _chunks(rows, chunk_size):
+        async with conn.begin():
+            await _insert_rows(conn, table, chunk)
+        count += len(chunk)
+    return count
+
+
+@asynccontextmanager
+async def deferred_indexes(conn: AsyncConnection):
+    """Drop non-unique indexes and search triggers, recreating them on exit.
+
+    Unique indexes stay in place so the load cannot create duplicates.
+    """
+    indexes = [index for table in LOADED_TABLES for index in table.indexes if not index.unique]
+    async with conn.begin():
+        for index in indexes:
+            await conn.run_sync(lambda sync_conn, index=index: index.drop(sync_conn, checkfirst=True))
+        if conn.dialect.name == "sqlite":
+            await product_search.drop_triggers(conn)
+    try:
+        yield
+    finally:
+        async with conn.begin():
+            for index in indexes:
+                await conn.run_sync(lambda sync_conn, index=index: index.create(sync_conn, checkfirst=True))
+            if conn.dialect.name == "sqlite":
+                # Also reindexes the rows loaded without the triggers
+                await product_search.setup(conn)
+
+
+@asynccontextmanager
+async def _bulk_load_pragmas(conn: AsyncConnection):
+    """Skip fsyncs for the load; an interrupted load is simply re-run."""
+    if conn.dialect.name != "sqlite":
+        yield
+        return
+    await conn.exec_driver_sql("PRAGMA synchronous = OFF")
+    await conn.commit()
+    try:
+        yield
+    finally:
+        # The connection goes back to the pool, so restore the normal profile
+        await conn.exec_driver_sql(f"PRAGMA synchronous = {settings.SQLITE_SYNCHRONOUS}")
+        await conn.commit()
+
+
+async def generate_dataset(
+    conn: AsyncConnection,
+    size: DatasetSize,
+    seed: int = 0,
+    chunk_size: int = 10_000,
+) -> dict[str, int]:
+    """Append a synthetic dataset to the database and return row counts.
+
+    Ids are assigned here, after the current maximum of each table, so
+    order items can reference their orders without reading ids back.
+    The rollups, sales counters and search index are not updated; use
+    `load_dataset` for a complete load.
+    """
+    if size.orders and not (size.products and size.customers):
+        raise ValueError("orders need at least one product and one customer")
+    rng = random.Random(seed)
+    random_value = rng.random
+    now = datetime.now(timezone.utc)
+    spread = size.days * 86400
+
+    category_start = await _next_id(conn, Category)
+    product_start = await _next_id(conn, Product)
+    customer_start = await _next_id(conn, Customer)
+    order_start = await _next_id(conn, Order)
+    item_start = await _next_id(conn, OrderItem)
+    await conn.commit()
+
+    category_rows = [
+        dict(id=category_start + i, name=name, slug=f"{name.lower().replace(' ', '-')}-{category_start + i}")
+        for i, name in enumerate(CATEGORY_NAMES)
+    ]
+    category_ids = [row["id"] for row in category_rows]
+    prices = {}
+
+    def products():
+        for i in range(size.products):
+            product_id = product_start + i
+            name = f"{rng.choice(ADJECTIVES)} {rng.choice(MATERIALS)} {rng.choice(NOUNS)}"
+            price = round(rng.uniform(5, 400), 2)
+            prices[product_id] = price
+            created_at = now - timedelta(seconds=int(random_value() * spread))
+            yield dict(
+                id=product_id,
+                name=name,
+                slug=f"{name.lower().replace(' ', '-')}-{product_id}",
+                description=f"{name} from our {rng.choice(CATEGORY_NAMES).lower()} collection.",
+                price=price,
+                compare_at_price=round(price * 1.25, 2) if random_value() < 0.2 else None,
+                cost=round(price * rng.uniform(0.3, 0.6), 2),
+                sku=f"SKU-{product_id:08d}",
+                stock=int(random_value() * 500),
+                images=[],
+                category_id=rng.choice(category_ids),
+                is_active=random_value() < 0.95,
+                is_featured=random_value() < 0.05,
+                created_at=created_at,
+                updated_at=created_at,
+            )
+
+    def customers():
+        for i in range(size.customers):
+            customer_id = customer_start + i
+            city, country = rng.choice(CITIES)
+            yield dict(
+                id=customer_id,
+                email=f"customer{customer_id}@example.com",
+                first_name=rng.choice(FIRST_NAMES),
+                last_name=rng.choice(LAST_NAMES),
+                city=city,
+                country=country,
+                created_at=now - timedelta(seconds=int(random_value() * spread)),
+            )
+
+    statuses = list(STATUS_WEIGHTS)
+    weights = list(STATUS_WEIGHTS.values())
+    max_items = max(1, 2 * size.items_per_order - 1)
+    items: list[dict] = []
+
+    def orders():
+        item_id = item_start
+        for i in range(size.orders):
+            order_id = order_start + i
+            subtotal = 0.0
+            for _ in range(1 + int(random_value() * max_items)):
+                product_id = product_start + int(random_value() * size.products)
+                quantity = 1 + int(random_value() * 4)
+                price = prices[product_id]
+                subtotal += price * quantity
+                items.append(dict(id=item_id, order_id=order_id, product_id=product_id, quantity=quantity, price=price))
+                item_id += 1
+            subtotal = round(subtotal, 2)
+            tax = round(subtotal * 0.1, 2)
+            created_at = now - timedelta(seconds=int(random_value() * spread))
+            yield dict(
+                id=order_id,
+                order_number=f"ORD-S{order_id:09d}",
+                customer_id=customer_start + int(random_value() * size.customers),
+                status=rng.choices(statuses, weights)[0],
+                subtotal=subtotal,
+                tax=tax,
+                shipping_cost=5.0,
+                total=round(subtotal + tax + 5.0, 2),
+                created_at=created_at,
+                updated_at=created_at,
+            )
+
+    counts = {"categories": await _insert_chunked(conn, Category.__table__, category_rows, chunk_size)}
+    counts["products"] = await _insert_chunked(conn, Product.__table__, products(), chunk_size)
+    counts["customers"] = await _insert_chunked(conn, Customer.__table__, customers(), chunk_size)
+
+    counts["orders"] = 0
+    counts["order_items"] = 0
+    for chunk in _chunks(orders(), chunk_size):
+        async with conn.begin():
+            await _insert_rows(conn, Order.__table__, chunk)
+            await _insert_rows(conn, OrderItem.__table__, items)
+        counts["orders"] += len(chunk)
+        counts["order_items"] += len(items)
+        items.clear()
+    return counts
+
+
+async def load_dataset(
+    engine: AsyncEngine,
+    size: DatasetSize,
+    seed: int = 0,
+    chunk_size: int = 10_000,
+    defer_indexes: bool = True,
+) -> dict[str, int]:
+    """Generate a dataset and leave the database ready to serve it.
+
+    Rebuilds the daily revenue rollup, the product sales counters and
+    the product search index and, on SQLite, refreshes planner
+    statistics.
+    """
+    async with engine.connect() as conn:
+        async with _bulk_load_pragmas(conn):
+            if defer_indexes:
+                async with deferred_indexes(conn):
+                    counts = await generate_dataset(conn, size, seed, chunk_size)
+            else:
+                counts = await generate_dataset(conn, size, seed, chunk_size)
+
+            async with AsyncSession(bind=conn) as session:
+                await backfill_daily_revenue(session)
+                await rebuild_product_sales(session)
+                await session.commit()
+            async with conn.begin():
+                await product_search.setup(conn)
+            if conn.dialect.name == "sqlite":
+                await conn.exec_driver_sql("ANALYZE")
+                await conn.commit()
+    return counts
+
+
+async def _run(args) -> None:
+    size = SCALES[args.scale]
+    size = DatasetSize(
+        products=args.products if args.products is not None else size.products,
+        customers=args.customers if args.customers is not None else size.customers,
+        orders=args.orders if args.orders is not None else size.orders,
+        items_per_order=args.items_per_order or size.items_per_order,
+        days=args.days or size.days,
+    )
+    await init_db()
+    print(
+        f"Generating {size.products} products, {size.customers} customers and "
+        f"{size.orders} orders (~{size.orders * size.items_per_order} items)..."
+    )
+    started = time.perf_counter()
+    counts = await load_dataset(
+        engine,
+        size,
+        seed=args.seed,
+        chunk_size=args.chunk_size,
+        defer_indexes=not args.keep_indexes,
+    )
+    elapsed = time.perf_counter() - started
+    rows = sum(counts.values())
+    print(f"Inserted {rows} rows in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s): {counts}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic NexusStore data")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="tiny", help="Preset sizes; the options below override it")
+    parser.add_argument("--products", type=int)
+    parser.add_argument("--customers", type=int)
+    parser.add_argument("--orders", type=int)
+    parser.add_argument("--items-per-order", type=int)
+    parser.add_argument("--days", type=int, help="Spread order dates over this many days")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=10_000, help="Rows per insert transaction")
+    parser.add_argument("--keep-indexes", action="store_true", help="Maintain indexes during the load")
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
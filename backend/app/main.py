@@ -1,17 +1,27 @@
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.router import api_router
 from app.core.config import settings
-from app.core.database import init_db
+from app.core.database import engine, init_db
+from app.core.metrics import METRICS_CONTENT_TYPE, InstrumentationMiddleware, request_metrics
+from app.core.pagination import NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER
+from app.core.security import password_pool
+from app.core.singleflight import analytics_flight
+from app.services.search import product_search
+from app.services.suggest import product_suggest
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Initialize database on startup."""
+    """Initialize database and search indexes on startup."""
     await init_db()
+    async with engine.begin() as conn:
+        await product_search.setup(conn)
+        await product_suggest.build(conn)
     yield
 
 
@@ -29,8 +39,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER, "ETag"],
 )
 
+# Per-request latency, size, status and SQL metrics (outermost, so it times CORS too)
+app.add_middleware(InstrumentationMiddleware)
+
 # Include API router
 app.include_router(api_router)
 
@@ -48,7 +62,20 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint for monitoring."""
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "password_hashing": password_pool.stats(),
+        "suggest_index": product_suggest.stats(),
+    }
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics in text exposition format."""
+    return PlainTextResponse(
+        request_metrics.render() + analytics_flight.render(),
+        media_type=METRICS_CONTENT_TYPE,
+    )
 
 
 @app.post("/api/seed")
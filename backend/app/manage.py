@@ -0,0 +1,83 @@
+"""Maintenance commands.
+
+Usage:
+    python -m app.manage backfill-revenue
+    python -m app.manage rebuild-product-sales
+    python -m app.manage prune-sales-buckets
+    python -m app.manage rebuild-search-index
+    python -m app.manage purge-idempotency-keys
+"""
+import argparse
+import asyncio
+
+from app.core.database import async_session_maker, engine, init_db
+from app.services.idempotency import order_idempotency
+from app.services.product_sales import prune_sales_buckets, rebuild_product_sales
+from app.services.revenue import backfill_daily_revenue
+from app.services.search import product_search
+
+
+async def backfill_revenue():
+    await init_db()
+    async with async_session_maker() as session:
+        print("Rebuilding daily revenue rollup from orders...")
+        rows = await backfill_daily_revenue(session)
+        await session.commit()
+        print(f"Wrote {rows} daily revenue rows.")
+
+
+async def rebuild_sales():
+    await init_db()
+    async with async_session_maker() as session:
+        print("Rebuilding product sales counters from orders...")
+        products = await rebuild_product_sales(session)
+        await session.commit()
+        print(f"Counted sales for {products} products.")
+
+
+async def prune_buckets():
+    await init_db()
+    async with async_session_maker() as session:
+        await prune_sales_buckets(session)
+        await session.commit()
+    print("Pruned expired product sales buckets.")
+
+
+async def rebuild_search_index():
+    await init_db()
+    async with engine.begin() as conn:
+        await product_search.setup(conn)
+        if not product_search.enabled:
+            print("Product search index is only available on SQLite with FTS5.")
+            return
+        print("Rebuilding product search index...")
+        await product_search.rebuild(conn)
+    print("Product search index rebuilt.")
+
+
+async def purge_idempotency_keys():
+    await init_db()
+    async with async_session_maker() as session:
+        purged = await order_idempotency.purge_expired(session)
+        await session.commit()
+    print(f"Purged {purged} expired idempotency keys.")
+
+
+COMMANDS = {
+    "backfill-revenue": backfill_revenue,
+    "rebuild-product-sales": rebuild_sales,
+    "prune-sales-buckets": prune_buckets,
+    "rebuild-search-index": rebuild_search_index,
+    "purge-idempotency-keys": purge_idempotency_keys,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NexusStore maintenance commands")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    args = parser.parse_args()
+    asyncio.run(COMMANDS[args.command]())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,3 @@
-from app.models.models import User, Customer, Category, Product, Order, OrderItem
+from app.models.models import User, Customer, Category, Product, Order, OrderItem, DailyRevenue, ProductSales, ProductSalesDaily, IdempotencyKey
 
-__all__ = ["User", "Customer", "Category", "Product", "Order", "OrderItem"]
+__all__ = ["User", "Customer", "Category", "Product", "Order", "OrderItem", "DailyRevenue", "ProductSales", "ProductSalesDaily", "IdempotencyKey"]
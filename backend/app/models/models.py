@@ -1,5 +1,5 @@
 from datetime import datetime, timezone
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey, JSON, Index, CheckConstraint
+from sqlalchemy import Column, Integer, String, Float, Boolean, Date, DateTime, Text, ForeignKey, JSON, Index, CheckConstraint
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -32,6 +32,10 @@ class Customer(Base):
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     
     orders = relationship("Order", back_populates="customer")
+    
+    __table_args__ = (
+        Index('idx_customer_created_id', 'created_at', 'id'),  # Keyset pagination
+    )
 
 
 class Category(Base):
@@ -72,6 +76,7 @@ class Product(Base):
     __table_args__ = (
         Index('idx_product_active_featured', 'is_active', 'is_featured'),
         Index('idx_product_category_active', 'category_id', 'is_active'),
+        Index('idx_product_created_id', 'created_at', 'id'),  # Keyset pagination
         CheckConstraint('price > 0', name='check_price_positive'),
         CheckConstraint('stock >= 0', name='check_stock_non_negative'),
         CheckConstraint('(compare_at_price IS NULL) OR (compare_at_price >= price)', name='check_compare_price'),
@@ -101,6 +106,7 @@ class Order(Base):
     # Composite index for common queries
     __table_args__ = (
         Index('idx_order_status_created', 'status', 'created_at'),
+        Index('idx_order_created_id', 'created_at', 'id'),  # Keyset pagination
         CheckConstraint('total >= 0', name='check_total_non_negative'),
         CheckConstraint('subtotal >= 0', name='check_subtotal_non_negative'),
     )
@@ -122,3 +128,53 @@ class OrderItem(Base):
         CheckConstraint('quantity > 0', name='check_quantity_positive'),
         CheckConstraint('price >= 0', name='check_price_non_negative'),
     )
+
+
+# Rollup maintained incrementally by the order routes.
+# Rebuild from scratch with: python -m app.manage backfill-revenue
+class DailyRevenue(Base):
+    __tablename__ = "daily_revenue"
+
+    day = Column(Date, primary_key=True)  # Day the order was placed (UTC)
+    status = Column(String(50), primary_key=True)
+    revenue = Column(Float, nullable=False, default=0)
+    orders = Column(Integer, nullable=False, default=0)
+
+
+# Per-product sales counters maintained incrementally by the order routes;
+# cancelled orders do not count.
+# Rebuild from scratch with: python -m app.manage rebuild-product-sales
+class ProductSales(Base):
+    __tablename__ = "product_sales"
+
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    units_sold = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+    last_sold_at = Column(DateTime)
+    
+    __table_args__ = (
+        Index('idx_product_sales_units_sold', 'units_sold'),  # Top-N scan
+    )
+
+
+# Daily buckets behind the windowed (last N days) top products
+class ProductSalesDaily(Base):
+    __tablename__ = "product_sales_daily"
+
+    day = Column(Date, primary_key=True)  # Day the order was placed (UTC)
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    units_sold = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+
+
+# Responses to POST requests sent with an Idempotency-Key header, stored in
+# the same transaction as the write so a retried request is never applied twice
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    scope = Column(String(50), primary_key=True)  # Endpoint the key belongs to
+    key = Column(String(255), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)  # Hash of the request body
+    status_code = Column(Integer, nullable=False)
+    response = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), index=True)  # Indexed for expiry
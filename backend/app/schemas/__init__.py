@@ -2,20 +2,24 @@ from app.schemas.schemas import (
     UserBase, UserCreate, UserResponse, Token, TokenData,
     CustomerBase, CustomerCreate, CustomerResponse,
     CategoryBase, CategoryCreate, CategoryResponse,
-    ProductBase, ProductCreate, ProductUpdate, ProductResponse,
+    ProductBase, ProductCreate, ProductUpdate, ProductUpsert, ProductResponse,
+    CategoryFacet, BooleanFacet, PriceBucket, ProductFacets, ProductSuggestion,
     OrderItemBase, OrderItemCreate, OrderItemResponse,
     OrderBase, OrderCreate, OrderUpdate, OrderResponse,
+    BulkRowError, BulkOrderCreated, BulkOrderResult, BulkUpsertResult,
     StatsResponse, RevenueDataPoint, TopProductResponse,
-    PaginatedResponse,
+    PaginatedResponse, CursorPage,
 )
 
 __all__ = [
     "UserBase", "UserCreate", "UserResponse", "Token", "TokenData",
     "CustomerBase", "CustomerCreate", "CustomerResponse",
     "CategoryBase", "CategoryCreate", "CategoryResponse",
-    "ProductBase", "ProductCreate", "ProductUpdate", "ProductResponse",
+    "ProductBase", "ProductCreate", "ProductUpdate", "ProductUpsert", "ProductResponse",
+    "CategoryFacet", "BooleanFacet", "PriceBucket", "ProductFacets", "ProductSuggestion",
     "OrderItemBase", "OrderItemCreate", "OrderItemResponse",
     "OrderBase", "OrderCreate", "OrderUpdate", "OrderResponse",
+    "BulkRowError", "BulkOrderCreated", "BulkOrderResult", "BulkUpsertResult",
     "StatsResponse", "RevenueDataPoint", "TopProductResponse",
-    "PaginatedResponse",
+    "PaginatedResponse", "CursorPage",
 ]
@@ -12,6 +12,12 @@ class PaginatedResponse(BaseModel, Generic[T]):
     page_size: int
     total_pages: int
 
+
+class CursorPage(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None  # Only computed when requested
+
 # ============ User Schemas ============
 class UserBase(BaseModel):
     email: EmailStr
@@ -119,6 +125,48 @@ class ProductUpdate(BaseModel):
     is_featured: Optional[bool] = None
 
 
+class ProductUpsert(ProductUpdate):
+    """A catalog feed row: matched on `sku`, only the given fields change.
+
+    New products also need `name` and `price`; `slug` only applies to them.
+    """
+    sku: str
+    slug: Optional[str] = None
+
+
+class CategoryFacet(BaseModel):
+    id: Optional[int] = None  # None counts products without a category
+    name: Optional[str] = None
+    count: int
+
+
+class BooleanFacet(BaseModel):
+    true: int = 0
+    false: int = 0
+
+
+class PriceBucket(BaseModel):
+    min: float
+    max: float
+    count: int
+
+
+class ProductFacets(BaseModel):
+    total: int
+    categories: list[CategoryFacet]
+    is_active: BooleanFacet
+    is_featured: BooleanFacet
+    price: list[PriceBucket]
+
+
+class ProductSuggestion(BaseModel):
+    id: int
+    name: str
+    slug: Optional[str] = None
+    sku: Optional[str] = None
+    price: float
+
+
 class ProductResponse(ProductBase):
     id: int
     created_at: datetime
@@ -184,12 +232,42 @@ class OrderResponse(OrderBase):
         from_attributes = True
 
 
+class BulkRowError(BaseModel):
+    index: int  # Position of the row in the submitted array
+    error: str
+
+
+class BulkOrderCreated(BaseModel):
+    index: int
+    id: int
+    order_number: str
+
+
+class BulkOrderResult(BaseModel):
+    created: int
+    failed: int
+    orders: list[BulkOrderCreated] = []
+    errors: list[BulkRowError] = []
+
+
+class BulkUpsertResult(BaseModel):
+    received: int  # Records read from the feed
+    created: int
+    updated: int
+    unchanged: int
+    failed: int
+    errors: list[BulkRowError] = []  # At most the first MAX_REPORTED_ERRORS
+
+
 # ============ Analytics Schemas ============
 class StatsResponse(BaseModel):
     total_revenue: float
     total_orders: int
-    avg_order_value: float
-    active_customers: int
+    average_order_value: float
+    total_customers: int
+    total_products: int
+    pending_orders: int
+    delivered_orders: int
 
 
 class RevenueDataPoint(BaseModel):
@@ -203,3 +281,4 @@ class TopProductResponse(BaseModel):
     product_name: str
     total_sold: int
     total_revenue: float
+    last_sold_at: Optional[datetime] = None
@@ -1,8 +1,8 @@
 import asyncio
 
-from app.core.database import SessionLocal, init_db
+from app.core.database import async_session_maker, init_db
 from app.models import Product, Category, User
-from app.core.security import get_password_hash
+from app.core.security import get_password_hash_async
 from sqlalchemy import select
 
 # Data from frontend/src/lib/products.ts
@@ -83,7 +83,7 @@ products_data = [
 
 async def seed():
     await init_db()
-    async with SessionLocal() as session:
+    async with async_session_maker() as session:
         # 1. Create Admin User
         print("Checking for admin user...")
         result = await session.execute(select(User).where(User.email == "admin@example.com"))
@@ -92,13 +92,12 @@ async def seed():
             print("Creating admin user...")
             admin_user = User(
                 email="admin@example.com",
-                hashed_password=get_password_hash("admin123"),
+                hashed_password=await get_password_hash_async("admin123"),
                 full_name="Admin User",
+                role="admin",
                 is_active=True,
-                is_superuser=True
             )
             session.add(admin_user)
-            await session.commit()
             print("Admin user created (admin@example.com / admin123)")
         else:
             print("Admin user already exists.")
@@ -106,41 +105,41 @@ async def seed():
         # 2. Create Categories & Products
         print("Seeding products...")
         
-        # Get unique categories from data
-        category_names = list(set(p['category_name'] for p in products_data))
-        categories = {}
-
+        # One query each for the categories and product slugs that already exist
+        category_names = sorted(set(p['category_name'] for p in products_data))
+        result = await session.execute(select(Category).where(Category.name.in_(category_names)))
+        categories = {category.name: category for category in result.scalars()}
         for cat_name in category_names:
-            result = await session.execute(select(Category).where(Category.name == cat_name))
-            category = result.scalar_one_or_none()
-            if not category:
+            if cat_name not in categories:
                 category = Category(name=cat_name, slug=cat_name.lower().replace(" ", "-"))
                 session.add(category)
-                await session.commit() # Commit to get ID
-                await session.refresh(category)
-            categories[cat_name] = category
+                categories[cat_name] = category
+        await session.flush()  # Assign category IDs
+
+        result = await session.execute(
+            select(Product.slug).where(Product.slug.in_([p['slug'] for p in products_data]))
+        )
+        existing_slugs = set(result.scalars())
 
         # Create Products
-        for p_data in products_data:
-            result = await session.execute(select(Product).where(Product.slug == p_data['slug']))
-            product = result.scalar_one_or_none()
-            
-            if not product:
-                cat = categories[p_data['category_name']]
-                new_product = Product(
-                    name=p_data['name'],
-                    description=p_data['description'],
-                    price=p_data['price'],
-                    image_url=p_data['image_url'],
-                    stock=p_data['stock'],
-                    slug=p_data['slug'],
-                    category_id=cat.id,
-                    is_active=True
-                )
-                session.add(new_product)
+        new_products = [
+            Product(
+                name=p_data['name'],
+                description=p_data['description'],
+                price=p_data['price'],
+                image_url=p_data['image_url'],
+                stock=p_data['stock'],
+                slug=p_data['slug'],
+                category_id=categories[p_data['category_name']].id,
+                is_active=True
+            )
+            for p_data in products_data
+            if p_data['slug'] not in existing_slugs
+        ]
+        session.add_all(new_products)
         
         await session.commit()
-        print(f"Seeded {len(products_data)} products.")
+        print(f"Seeded {len(new_products)} products.")
 
 if __name__ == "__main__":
     asyncio.run(seed())
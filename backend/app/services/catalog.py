@@ -0,0 +1,48 @@
+from typing import Iterable, Optional
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+# Storefront reads of products and categories. Keys:
+#   ("product", id), ("products", <listing params>),
+#   ("category", id), ("categories",)
+# Values are rendered JSON bodies, so hits and 304s skip serialization.
+catalog_cache = TTLCache(
+    maxsize=settings.CATALOG_CACHE_MAX_ENTRIES,
+    ttl=settings.CATALOG_CACHE_TTL_SECONDS,
+)
+
+CATALOG_CACHE_CONTROL = f"public, max-age={settings.CATALOG_HTTP_MAX_AGE}"
+
+
+def normalize_search(search: Optional[str]) -> Optional[str]:
+    """Case- and whitespace-insensitive form of a search term for cache keys."""
+    if not search:
+        return None
+    return " ".join(search.lower().split()) or None
+
+
+def invalidate_product(product_id: Optional[int] = None) -> None:
+    """Drop a product and every cached listing that might include it."""
+    if product_id is not None:
+        catalog_cache.invalidate(("product", product_id))
+    catalog_cache.invalidate_namespace("products")
+
+
+def invalidate_products(product_ids: Iterable[int]) -> None:
+    """`invalidate_product` for several products, e.g. after their stock changed."""
+    for product_id in product_ids:
+        catalog_cache.invalidate(("product", product_id))
+    catalog_cache.invalidate_namespace("products")
+
+
+def invalidate_all_products() -> None:
+    """Drop every cached product and listing, after a bulk write."""
+    catalog_cache.invalidate_namespace("product")
+    catalog_cache.invalidate_namespace("products")
+
+
+def invalidate_category(category_id: Optional[int] = None) -> None:
+    if category_id is not None:
+        catalog_cache.invalidate(("category", category_id))
+    catalog_cache.invalidate(("categories",))
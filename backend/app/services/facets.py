@@ -0,0 +1,107 @@
+from collections import defaultdict
+from typing import Optional
+
+from sqlalchemy import Integer, Select, and_, case, cast, func, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Category, Product
+
+
+def _selected(columns, category_id: Optional[int], is_active: Optional[bool], is_featured: Optional[bool]):
+    conditions = []
+    if category_id is not None:
+        conditions.append(columns.category_id == category_id)
+    if is_active is not None:
+        conditions.append(columns.is_active == is_active)
+    if is_featured is not None:
+        conditions.append(columns.is_featured == is_featured)
+    return and_(*conditions) if conditions else true()
+
+
+async def product_facets(
+    db: AsyncSession,
+    matched: Select,
+    category_id: Optional[int] = None,
+    is_active: Optional[bool] = None,
+    is_featured: Optional[bool] = None,
+    buckets: int = 10,
+) -> dict:
+    """Category, active and featured counts and a price histogram (ProductFacets).
+
+    `matched` selects `Product` rows with every filter applied except the
+    three faceted ones, which are grouped on instead; each facet then
+    counts the rows matching the other two, so a storefront can show how
+    many products picking another category would give. `total` and the
+    histogram use all the filters. The histogram has `buckets` equal-width
+    buckets between the lowest and highest matching price (one bucket if
+    they are equal).
+
+    It is all one statement: window functions find the price range, and
+    the rows are grouped by (category, is_active, is_featured, bucket).
+    """
+    selected = _selected(Product, category_id, is_active, is_featured)
+    rows = matched.with_only_columns(
+        Product.category_id,
+        Product.is_active,
+        Product.is_featured,
+        Product.price,
+        case((selected, True), else_=False).label("selected"),  # False, not NULL, for a NULL category_id
+        func.min(case((selected, Product.price))).over().label("low"),
+        func.max(case((selected, Product.price))).over().label("high"),
+    ).subquery()
+
+    # floor() first: casting to an integer truncates on SQLite but rounds on PostgreSQL
+    position = cast(func.floor((rows.c.price - rows.c.low) * buckets / (rows.c.high - rows.c.low)), Integer)
+    bucket = case(
+        (~rows.c.selected, None),
+        (rows.c.high == rows.c.low, 0),
+        (position >= buckets, buckets - 1),  # The highest price closes the last bucket
+        else_=position,
+    ).label("bucket")
+    group = (rows.c.category_id, Category.name, rows.c.is_active, rows.c.is_featured, bucket, rows.c.low, rows.c.high)
+    result = await db.execute(
+        select(*group, func.count())
+        .outerjoin(Category, Category.id == rows.c.category_id)
+        .group_by(*group)
+    )
+
+    total = 0
+    low = high = None
+    categories: dict[Optional[int], list] = {}
+    active = defaultdict(int)
+    featured = defaultdict(int)
+    histogram = [0] * buckets
+    for row_category, name, row_active, row_featured, row_bucket, row_low, row_high, count in result:
+        in_category = category_id is None or row_category == category_id
+        in_active = is_active is None or row_active == is_active
+        in_featured = is_featured is None or row_featured == is_featured
+        if in_active and in_featured:
+            categories.setdefault(row_category, [name, 0])[1] += count
+        if in_category and in_featured:
+            active[bool(row_active)] += count
+        if in_category and in_active:
+            featured[bool(row_featured)] += count
+        if row_bucket is not None:
+            total += count
+            histogram[row_bucket] += count
+            low, high = row_low, row_high
+
+    price = []
+    if total and low == high:
+        price = [{"min": low, "max": high, "count": total}]
+    elif total:
+        width = (high - low) / buckets
+        price = [
+            {"min": round(low + i * width, 2), "max": round(low + (i + 1) * width, 2) if i < buckets - 1 else high, "count": count}
+            for i, count in enumerate(histogram)
+        ]
+    return {
+        "total": total,
+        "categories": [
+            {"id": row_category, "name": name, "count": count}
+            for row_category, (name, count) in sorted(categories.items(), key=lambda item: (-item[1][1], item[1][0] or ""))
+        ],
+        "is_active": {"true": active[True], "false": active[False]},
+        "is_featured": {"true": featured[True], "false": featured[False]},
+        "price": price,
+    }
@@ -0,0 +1,172 @@
+import asyncio
+import hashlib
+import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Optional
+
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import MISSING, TTLCache
+from app.core.config import settings
+from app.models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    fingerprint: str
+    status_code: int
+    body: Any
+
+
+class IdempotencyKeyReused(Exception):
+    """The key was already used with a different request body."""
+
+
+def request_fingerprint(payload: Any) -> str:
+    """Stable hash of a JSON-compatible request body."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class IdempotencyStore:
+    """Replays the stored response for a repeated Idempotency-Key.
+
+    Keys are stored in `idempotency_keys` by the handler itself, in the
+    transaction that performs the write, so the primary key rejects a
+    duplicate even across processes. Recent keys are also kept in an LRU
+    so replays skip the database, and concurrent requests with the same
+    key in this process wait for the first one instead of racing it.
+    """
+
+    def __init__(self, scope: str, ttl: float, maxsize: int):
+        self.scope = scope
+        self.ttl = ttl
+        self._responses = TTLCache(maxsize, ttl)
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.replayed = 0
+        self.coalesced = 0
+
+    def _cutoff(self) -> datetime:
+        # Stored timestamps are naive UTC
+        return datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=self.ttl)
+
+    async def _load(self, db: AsyncSession, key: str) -> Optional[StoredResponse]:
+        cached = self._responses.get((self.scope, key))
+        if cached is not MISSING:
+            return cached
+        row = await db.get(IdempotencyKey, (self.scope, key))
+        if row is None:
+            return None
+        if row.created_at.replace(tzinfo=None) < self._cutoff():
+            # Expired: free the key for this request
+            await db.delete(row)
+            await db.flush()
+            return None
+        stored = StoredResponse(row.fingerprint, row.status_code, row.response)
+        self._responses.set((self.scope, key), stored)
+        return stored
+
+    def _check(self, stored: StoredResponse, fingerprint: str) -> StoredResponse:
+        if stored.fingerprint != fingerprint:
+            raise IdempotencyKeyReused()
+        self.replayed += 1
+        return stored
+
+    def record(self, db: AsyncSession, key: str, fingerprint: str, status_code: int, body: Any) -> None:
+        """Add the key row to the handler's transaction; call before committing."""
+        db.add(IdempotencyKey(
+            scope=self.scope,
+            key=key,
+            fingerprint=fingerprint,
+            status_code=status_code,
+            response=body,
+        ))
+
+    async def run(
+        self,
+        db: AsyncSession,
+        key: str,
+        fingerprint: str,
+        handler: Callable[[], Awaitable[StoredResponse]],
+    ) -> tuple[StoredResponse, bool]:
+        """Return `(response, replayed)` for a keyed request.
+
+        `handler` performs the write, calls `record` and commits. Only
+        successful responses are stored: if the handler raises, the key
+        stays free and the request can be retried. If the request being
+        waited for is cancelled (its client gave up), a waiter takes over.
+        """
+        while True:
+            stored = await self._load(db, key)
+            if stored is not None:
+                return self._check(stored, fingerprint), True
+
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            self.coalesced += 1
+            try:
+                stored = await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                continue  # The leader rolled back and left the key free
+            return self._check(stored, fingerprint), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            try:
+                stored = await handler()
+            except IntegrityError:
+                # Another process committed the same key first
+                await db.rollback()
+                stored = await self._load(db, key)
+                if stored is None:
+                    raise
+                future.set_result(stored)
+                return self._check(stored, fingerprint), True
+            self._responses.set((self.scope, key), stored)
+            future.set_result(stored)
+            return stored, False
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            if not future.done():
+                future.set_exception(e)
+                # Waiters re-raise it; don't warn when nobody was waiting
+                future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def purge_expired(self, db: AsyncSession) -> int:
+        """Delete expired keys. The caller commits."""
+        result = await db.execute(
+            delete(IdempotencyKey)
+            .where(IdempotencyKey.scope == self.scope)
+            .where(IdempotencyKey.created_at < self._cutoff())
+        )
+        return result.rowcount
+
+    def stats(self) -> dict:
+        return {
+            "replayed": self.replayed,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+            "cache": self._responses.stats(),
+        }
+
+
+order_idempotency = IdempotencyStore(
+    "orders.create",
+    settings.IDEMPOTENCY_TTL_SECONDS,
+    settings.IDEMPOTENCY_CACHE_MAX_ENTRIES,
+)
@@ -0,0 +1,115 @@
+from collections import defaultdict
+from typing import Iterable
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Product
+
+# Orders in these statuses hold no stock
+RELEASED_STATUSES = ("cancelled",)
+
+# (product_id, quantity)
+StockLine = tuple[int, int]
+
+
+class InsufficientStockError(Exception):
+    """Raised when a reservation cannot be met; nothing has been reserved."""
+
+    def __init__(self, product_ids: list[int]):
+        self.product_ids = product_ids
+        super().__init__(f"Insufficient stock for products: {product_ids}")
+
+
+class UnknownProductsError(Exception):
+    """Raised when order lines reference products that do not exist."""
+
+    def __init__(self, product_ids: list[int]):
+        self.product_ids = product_ids
+        super().__init__(f"Products not found: {product_ids}")
+
+
+def _quantities(lines: Iterable[StockLine]) -> dict[int, int]:
+    totals = defaultdict(int)
+    for product_id, quantity in lines:
+        totals[product_id] += quantity
+    return dict(totals)
+
+
+def _has_stock(table, quantities: dict[int, int]):
+    return table.c.stock >= case(quantities, value=table.c.id)
+
+
+def _adjust_stock(quantities: dict[int, int], sign: int):
+    table = Product.__table__
+    delta = case(quantities, value=table.c.id)
+    return (
+        update(table)
+        .where(table.c.id.in_(quantities))
+        .values(stock=table.c.stock + sign * delta)
+    )
+
+
+async def reserve_stock(db: AsyncSession, lines: Iterable[StockLine]) -> list[int]:
+    """Take stock for every line of an order with one conditional UPDATE.
+
+    A product row is only decremented if it still has enough stock, and
+    the statement only applies if every product does, so concurrent
+    checkouts cannot oversell and no lock is held beyond the row writes
+    themselves. Returns the ids of the products whose stock changed. On
+    failure `UnknownProductsError` names products that do not exist, or
+    else `InsufficientStockError` the short ones; either way the caller
+    must roll back its transaction.
+    """
+    quantities = _quantities(lines)
+    if not quantities:
+        return []
+    table = Product.__table__
+    # Uncorrelated, so it is evaluated once before any row changes: all or nothing
+    snapshot = table.alias("available")
+    all_available = (
+        select(func.count())
+        .where(snapshot.c.id.in_(quantities))
+        .where(_has_stock(snapshot, quantities))
+        .scalar_subquery()
+        == len(quantities)
+    )
+    result = await db.execute(
+        _adjust_stock(quantities, -1)
+        .where(_has_stock(table, quantities))
+        .where(all_available)
+    )
+    if result.rowcount == len(quantities):
+        return sorted(quantities)
+
+    rows = (await db.execute(
+        select(table.c.id, _has_stock(table, quantities)).where(table.c.id.in_(quantities))
+    )).all()
+    unknown = set(quantities) - {row[0] for row in rows}
+    if unknown:
+        raise UnknownProductsError(sorted(unknown))
+    raise InsufficientStockError(sorted(row[0] for row in rows if not row[1]))
+
+
+async def release_stock(db: AsyncSession, lines: Iterable[StockLine]) -> list[int]:
+    """Return stock held by cancelled order lines; returns the product ids."""
+    quantities = _quantities(lines)
+    if quantities:
+        await db.execute(_adjust_stock(quantities, 1))
+    return sorted(quantities)
+
+
+async def record_order_stock_status_change(db: AsyncSession, order, old_status: str) -> list[int]:
+    """Release stock when an order is cancelled and reserve it again if reinstated.
+
+    `order.items` must be loaded. Returns the ids of the products whose
+    stock changed.
+    """
+    held = old_status not in RELEASED_STATUSES
+    holds = order.status not in RELEASED_STATUSES
+    if held == holds:
+        return []
+    lines = [(item.product_id, item.quantity) for item in order.items]
+    if holds:
+        return await reserve_stock(db, lines)
+    return await release_stock(db, lines)
@@ -0,0 +1,181 @@
+import uuid
+from datetime import datetime, timezone
+from typing import Any
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Customer, Order, OrderItem, Product
+from app.schemas import BulkOrderCreated, BulkOrderResult, BulkRowError, OrderCreate
+from app.services.inventory import RELEASED_STATUSES, InsufficientStockError, UnknownProductsError, reserve_stock
+from app.services.product_sales import record_orders_sales
+from app.services.revenue import record_orders_created
+
+# Attempts per row on the slow path; a retry draws a fresh order number
+ROW_ATTEMPTS = 3
+
+
+def generate_order_number() -> str:
+    """Generate a unique order number."""
+    return f"ORD-{uuid.uuid4().hex[:8].upper()}"
+
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc']) or 'order'}: {e['msg']}"
+        for e in error.errors()
+    )
+
+
+def _check_amounts(order: OrderCreate) -> None:
+    """Mirror the table CHECK constraints so bad rows never abort a chunk."""
+    if order.total < 0 or order.subtotal < 0:
+        raise ValueError("total and subtotal must be >= 0")
+    for item in order.items:
+        if item.quantity <= 0:
+            raise ValueError(f"product {item.product_id}: quantity must be > 0")
+        if item.price < 0:
+            raise ValueError(f"product {item.product_id}: price must be >= 0")
+
+
+async def _check_references(
+    db: AsyncSession,
+    chunk: list[tuple[int, OrderCreate]],
+    errors: list[BulkRowError],
+) -> list[tuple[int, OrderCreate]]:
+    """Drop rows that reference unknown customers or products (two queries per chunk)."""
+    customer_ids = {order.customer_id for _, order in chunk}
+    product_ids = {item.product_id for _, order in chunk for item in order.items}
+    known_customers = set(
+        (await db.execute(select(Customer.id).where(Customer.id.in_(customer_ids)))).scalars()
+    )
+    known_products = set(
+        (await db.execute(select(Product.id).where(Product.id.in_(product_ids)))).scalars()
+    ) if product_ids else set()
+
+    valid = []
+    for index, order in chunk:
+        if order.customer_id not in known_customers:
+            errors.append(BulkRowError(index=index, error=f"Customer {order.customer_id} not found"))
+            continue
+        missing = sorted({item.product_id for item in order.items} - known_products)
+        if missing:
+            errors.append(BulkRowError(index=index, error=f"Products not found: {missing}"))
+            continue
+        valid.append((index, order))
+    return valid
+
+
+async def insert_orders(db: AsyncSession, chunk: list[tuple[int, OrderCreate]]) -> list[BulkOrderCreated]:
+    """Insert orders and their items with one multi-row statement each.
+
+    Stock for the whole chunk is reserved first, with one statement;
+    `InsufficientStockError` (or `UnknownProductsError`, should a product
+    be deleted after the reference check) means nothing should be committed. Also
+    updates the daily revenue rollup and product sales counters. The
+    caller commits.
+    """
+    await reserve_stock(db, [
+        (item.product_id, item.quantity)
+        for _, order in chunk
+        if order.status not in RELEASED_STATUSES
+        for item in order.items
+    ])
+    now = datetime.now(timezone.utc)
+    order_rows = [
+        dict(
+            order_number=generate_order_number(),
+            customer_id=order.customer_id,
+            status=order.status,
+            total=order.total,
+            subtotal=order.subtotal,
+            tax=order.tax,
+            shipping_cost=order.shipping_cost,
+            shipping_address=order.shipping_address,
+            billing_address=order.billing_address,
+            notes=order.notes,
+            created_at=now,
+            updated_at=now,
+        )
+        for _, order in chunk
+    ]
+    # Order numbers are unique, so RETURNING can come back in any order; not
+    # asking for parameter order keeps SQLite on batched multi-row inserts.
+    result = await db.execute(
+        insert(Order.__table__).returning(Order.id, Order.order_number),
+        order_rows,
+    )
+    ids_by_number = {row.order_number: row.id for row in result}
+    order_ids = [ids_by_number[row["order_number"]] for row in order_rows]
+
+    item_rows = [
+        dict(order_id=order_id, product_id=item.product_id, quantity=item.quantity, price=item.price)
+        for order_id, (_, order) in zip(order_ids, chunk)
+        for item in order.items
+    ]
+    if item_rows:
+        await db.execute(insert(OrderItem.__table__), item_rows)
+    await record_orders_created(db, order_rows)
+    await record_orders_sales(db, dict(zip(order_ids, order_rows)), item_rows)
+
+    return [
+        BulkOrderCreated(index=index, id=order_id, order_number=row["order_number"])
+        for (index, _), order_id, row in zip(chunk, order_ids, order_rows)
+    ]
+
+
+async def ingest_orders(db: AsyncSession, rows: list[Any], chunk_size: int) -> BulkOrderResult:
+    """Validate and insert many orders, committing once per chunk.
+
+    Invalid rows are reported by index and never block the rest of the
+    batch. If a chunk still fails at the database or runs out of stock,
+    it is retried row by row so only the offending rows are rejected.
+    """
+    errors: list[BulkRowError] = []
+    created: list[BulkOrderCreated] = []
+
+    valid: list[tuple[int, OrderCreate]] = []
+    for index, raw in enumerate(rows):
+        try:
+            order = OrderCreate.model_validate(raw)
+            _check_amounts(order)
+        except ValidationError as e:
+            errors.append(BulkRowError(index=index, error=_format_validation_error(e)))
+            continue
+        except ValueError as e:
+            errors.append(BulkRowError(index=index, error=str(e)))
+            continue
+        valid.append((index, order))
+
+    for start in range(0, len(valid), chunk_size):
+        chunk = await _check_references(db, valid[start:start + chunk_size], errors)
+        if not chunk:
+            continue
+        try:
+            chunk_created = await insert_orders(db, chunk)
+            await db.commit()
+            created.extend(chunk_created)
+            continue
+        except (IntegrityError, InsufficientStockError, UnknownProductsError):
+            await db.rollback()
+
+        for row in chunk:
+            for attempt in range(ROW_ATTEMPTS):
+                try:
+                    row_created = await insert_orders(db, [row])
+                    await db.commit()
+                    created.extend(row_created)
+                    break
+                except (InsufficientStockError, UnknownProductsError) as e:
+                    await db.rollback()
+                    errors.append(BulkRowError(index=row[0], error=str(e)))
+                    break
+                except IntegrityError as e:
+                    await db.rollback()
+                    if attempt == ROW_ATTEMPTS - 1:
+                        errors.append(BulkRowError(index=row[0], error=str(e.orig)))
+
+    errors.sort(key=lambda e: e.index)
+    return BulkOrderResult(created=len(created), failed=len(errors), orders=created, errors=errors)
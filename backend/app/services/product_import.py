@@ -0,0 +1,213 @@
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator
+
+import orjson
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import dialect_insert
+from app.core.feeds import FeedRecord
+from app.models import Category, Product
+from app.schemas import BulkRowError, BulkUpsertResult, ProductCreate, ProductUpsert
+from app.services.orders import _format_validation_error
+from app.services.slugs import SlugAllocator, generate_slug
+
+# Stop listing errors after this many; they are still counted in `failed`
+MAX_REPORTED_ERRORS = 1000
+
+# Columns a feed row can set, besides the sku it is matched on
+UPSERT_COLUMNS = tuple(name for name in ProductUpsert.model_fields if name not in ("sku", "slug"))
+
+
+class _Outcome:
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.errors: list[BulkRowError] = []
+
+
+def _parse(record: dict[str, Any]) -> ProductUpsert:
+    images = record.get("images")
+    if isinstance(images, str):
+        # CSV cells hold lists as JSON, as the export writes them
+        try:
+            record = {**record, "images": orjson.loads(images)}
+        except orjson.JSONDecodeError:
+            pass  # Left for validation to reject
+    return ProductUpsert.model_validate(record)
+
+
+def _check_row(row: dict[str, Any]) -> None:
+    """Mirror the products table constraints so a bad row never aborts a chunk."""
+    if not row.get("name"):
+        raise ValueError("name is required")
+    if row.get("price") is None or row["price"] <= 0:
+        raise ValueError("price must be > 0")
+    if row.get("stock") is not None and row["stock"] < 0:
+        raise ValueError("stock must be >= 0")
+    if row.get("compare_at_price") is not None and row["compare_at_price"] < row["price"]:
+        raise ValueError("compare_at_price must be >= price")
+
+
+async def _upsert_chunk(
+    db: AsyncSession,
+    chunk: list[tuple[int, ProductUpsert]],
+    allocator: SlugAllocator,
+) -> _Outcome:
+    """Diff a chunk against the stored rows and write the changes with one upsert.
+
+    Rows repeating a sku within the chunk are merged, later values
+    winning. The caller commits.
+    """
+    outcome = _Outcome()
+    latest: dict[str, tuple[int, dict[str, Any], ProductUpsert]] = {}
+    for index, item in chunk:
+        fields = item.model_dump(include=set(UPSERT_COLUMNS), exclude_unset=True)
+        if item.sku in latest:
+            fields = {**latest[item.sku][1], **fields}
+        latest[item.sku] = (index, fields, item)
+
+    result = await db.execute(
+        select(Product.id, Product.sku, *(getattr(Product, name) for name in UPSERT_COLUMNS))
+        .where(Product.sku.in_(list(latest)))
+    )
+    existing = {row.sku: row._mapping for row in result}
+
+    category_ids = {fields["category_id"] for _, fields, _ in latest.values() if fields.get("category_id") is not None}
+    known_categories = set(
+        (await db.execute(select(Category.id).where(Category.id.in_(category_ids)))).scalars()
+    ) if category_ids else set()
+
+    now = datetime.now(timezone.utc)
+    rows: list[dict[str, Any]] = []
+    new_rows: list[dict[str, Any]] = []
+    changed_columns: set[str] = set()
+    for sku, (index, fields, item) in latest.items():
+        try:
+            category_id = fields.get("category_id")
+            if category_id is not None and category_id not in known_categories:
+                raise ValueError(f"Category {category_id} not found")
+            current = existing.get(sku)
+            if current is None:
+                if "name" not in fields or "price" not in fields:
+                    raise ValueError("name and price are required for new products")
+                row = ProductCreate.model_validate({**fields, "sku": sku}).model_dump(include=set(UPSERT_COLUMNS))
+            else:
+                changes = {name: value for name, value in fields.items() if current[name] != value}
+                if not changes:
+                    outcome.unchanged += 1
+                    continue
+                row = {**{name: current[name] for name in UPSERT_COLUMNS}, **changes}
+            _check_row(row)
+        except ValidationError as e:
+            outcome.errors.append(BulkRowError(index=index, error=_format_validation_error(e)))
+            continue
+        except ValueError as e:
+            outcome.errors.append(BulkRowError(index=index, error=str(e)))
+            continue
+
+        row.update(sku=sku, updated_at=now)
+        if current is None:
+            row.update(created_at=now, slug=item.slug or generate_slug(row["name"]))
+            new_rows.append(row)
+            outcome.created += 1
+        else:
+            # Only the changed columns are written back; these fill the VALUES
+            row.update(created_at=now, slug=None)
+            changed_columns.update(changes)
+            outcome.updated += 1
+        rows.append(row)
+
+    if not rows:
+        return outcome
+
+    if new_rows:
+        await allocator.load(db, {row["slug"] for row in new_rows})
+        for row in new_rows:
+            row["slug"] = allocator.allocate(row["slug"])
+
+    stmt = dialect_insert(db, Product)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Product.sku],
+        set_={
+            name: getattr(stmt.excluded, name)
+            for name in (*sorted(changed_columns), "updated_at")
+        },
+    )
+    await db.execute(stmt, rows)
+    return outcome
+
+
+async def upsert_products(
+    db: AsyncSession,
+    records: AsyncIterator[FeedRecord],
+    chunk_size: int,
+) -> BulkUpsertResult:
+    """Create or update products from a feed, committing once per chunk.
+
+    Rows are matched on `sku`; unchanged rows are not written, and a sku
+    repeated within a chunk is applied once, with its last values. Invalid
+    rows are reported by index and never block the rest of the feed. If
+    a chunk still fails at the database (say, a concurrent insert of the
+    same slug) it is retried row by row, so only the offending rows fail.
+    """
+    received = created = updated = unchanged = 0
+    errors: list[BulkRowError] = []
+    # Shared by the chunks so a family is read once per import, not once per chunk
+    allocator = SlugAllocator()
+
+    def collect(outcome: _Outcome) -> None:
+        nonlocal created, updated, unchanged
+        created += outcome.created
+        updated += outcome.updated
+        unchanged += outcome.unchanged
+        errors.extend(outcome.errors)
+
+    async def write(chunk: list[tuple[int, ProductUpsert]]) -> None:
+        nonlocal allocator
+        try:
+            outcome = await _upsert_chunk(db, chunk, allocator)
+            await db.commit()
+            collect(outcome)
+            return
+        except IntegrityError:
+            await db.rollback()
+        for row in chunk:
+            # Slugs reserved for rolled back rows, or taken concurrently, are re-read
+            allocator = SlugAllocator()
+            try:
+                outcome = await _upsert_chunk(db, [row], allocator)
+                await db.commit()
+                collect(outcome)
+            except IntegrityError as e:
+                await db.rollback()
+                errors.append(BulkRowError(index=row[0], error=str(e.orig)))
+
+    chunk: list[tuple[int, ProductUpsert]] = []
+    async for index, record, error in records:
+        received += 1
+        if error is None:
+            try:
+                chunk.append((index, _parse(record)))
+            except ValidationError as e:
+                error = _format_validation_error(e)
+        if error is not None:
+            errors.append(BulkRowError(index=index, error=error))
+        if len(chunk) >= chunk_size:
+            await write(chunk)
+            chunk = []
+    if chunk:
+        await write(chunk)
+
+    errors.sort(key=lambda e: e.index)
+    return BulkUpsertResult(
+        received=received,
+        created=created,
+        updated=updated,
+        unchanged=unchanged,
+        failed=len(errors),
+        errors=errors[:MAX_REPORTED_ERRORS],
+    )
@@ -0,0 +1,232 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy import Date, case, cast, delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import dialect_insert
+from app.models import Order, OrderItem, Product, ProductSales, ProductSalesDaily
+from app.schemas import TopProductResponse
+from app.services.revenue import EXCLUDED_STATUSES
+
+# Longest window served from the daily buckets; older buckets are pruned
+SALES_BUCKET_DAYS = 90
+
+# (product_id, quantity, price)
+SaleLine = tuple[int, int, float]
+
+
+def _order_time(order) -> datetime:
+    return order.created_at or datetime.now(timezone.utc)
+
+
+async def _add_sales(
+    db: AsyncSession,
+    sold_at: datetime,
+    lines: Iterable[SaleLine],
+    sign: int = 1,
+) -> None:
+    """Add (or with sign=-1, remove) order lines to the counters and day bucket.
+
+    One multi-row upsert per table, whatever the number of lines.
+    """
+    totals = defaultdict(lambda: [0, 0.0])
+    for product_id, quantity, price in lines:
+        total = totals[product_id]
+        total[0] += sign * quantity
+        total[1] += sign * quantity * price
+    if not totals:
+        return
+
+    stmt = dialect_insert(db, ProductSales).values([
+        dict(product_id=product_id, units_sold=units, revenue=revenue, last_sold_at=sold_at)
+        for product_id, (units, revenue) in totals.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ProductSales.product_id],
+        set_={
+            "units_sold": ProductSales.units_sold + stmt.excluded.units_sold,
+            "revenue": ProductSales.revenue + stmt.excluded.revenue,
+            "last_sold_at": case(
+                (ProductSales.last_sold_at >= stmt.excluded.last_sold_at, ProductSales.last_sold_at),
+                else_=stmt.excluded.last_sold_at,
+            ),
+        },
+    )
+    await db.execute(stmt)
+
+    day = sold_at.date()
+    if day < datetime.now(timezone.utc).date() - timedelta(days=SALES_BUCKET_DAYS):
+        return
+    stmt = dialect_insert(db, ProductSalesDaily).values([
+        dict(day=day, product_id=product_id, units_sold=units, revenue=revenue)
+        for product_id, (units, revenue) in totals.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ProductSalesDaily.day, ProductSalesDaily.product_id],
+        set_={
+            "units_sold": ProductSalesDaily.units_sold + stmt.excluded.units_sold,
+            "revenue": ProductSalesDaily.revenue + stmt.excluded.revenue,
+        },
+    )
+    await db.execute(stmt)
+
+
+async def record_order_sales(db: AsyncSession, order: Order, lines: Iterable[SaleLine]) -> None:
+    """Count a newly inserted order's lines, unless it was created cancelled."""
+    if order.status in EXCLUDED_STATUSES:
+        return
+    await _add_sales(db, _order_time(order), lines)
+
+
+async def record_orders_sales(db: AsyncSession, orders: dict[int, dict], items: list[dict]) -> None:
+    """Count a batch of inserted rows (orders keyed by id), one upsert pair per order day."""
+    counted = {
+        order_id: order["created_at"]
+        for order_id, order in orders.items()
+        if order["status"] not in EXCLUDED_STATUSES
+    }
+    by_day = defaultdict(list)
+    for item in items:
+        created_at = counted.get(item["order_id"])
+        if created_at is not None:
+            by_day[created_at.date()].append((created_at, (item["product_id"], item["quantity"], item["price"])))
+    for entries in by_day.values():
+        await _add_sales(db, max(created_at for created_at, _ in entries), [line for _, line in entries])
+
+
+async def record_order_sales_status_change(db: AsyncSession, order: Order, old_status: str) -> None:
+    """Remove an order's lines when it is cancelled, and restore them if it is reinstated.
+
+    `order.items` must be loaded. `last_sold_at` is not moved back on
+    cancellation; a rebuild recomputes it.
+    """
+    was_counted = old_status not in EXCLUDED_STATUSES
+    is_counted = order.status not in EXCLUDED_STATUSES
+    if was_counted == is_counted:
+        return
+    lines = [(item.product_id, item.quantity, item.price) for item in order.items]
+    await _add_sales(db, _order_time(order), lines, sign=1 if is_counted else -1)
+
+
+async def top_selling_products(
+    db: AsyncSession,
+    limit: int,
+    days: Optional[int] = None,
+) -> list[TopProductResponse]:
+    """Best sellers by units sold, all time or over the last `days` days.
+
+    All time is a scan of the units_sold index; a window sums at most
+    `days` daily buckets per product.
+    """
+    if days is None:
+        query = (
+            select(
+                ProductSales.product_id,
+                Product.name,
+                ProductSales.units_sold,
+                ProductSales.revenue,
+                ProductSales.last_sold_at,
+            )
+            .join(Product, Product.id == ProductSales.product_id)
+            .where(ProductSales.units_sold > 0)
+            .order_by(ProductSales.units_sold.desc(), ProductSales.product_id)
+            .limit(limit)
+        )
+    else:
+        start = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+        units = func.sum(ProductSalesDaily.units_sold).label("units_sold")
+        window = (
+            select(
+                ProductSalesDaily.product_id,
+                units,
+                func.sum(ProductSalesDaily.revenue).label("revenue"),
+            )
+            .where(ProductSalesDaily.day >= start)
+            .group_by(ProductSalesDaily.product_id)
+            .having(units > 0)
+            .order_by(units.desc(), ProductSalesDaily.product_id)
+            .limit(limit)
+            .subquery()
+        )
+        query = (
+            select(
+                window.c.product_id,
+                Product.name,
+                window.c.units_sold,
+                window.c.revenue,
+                ProductSales.last_sold_at,
+            )
+            .join(Product, Product.id == window.c.product_id)
+            .outerjoin(ProductSales, ProductSales.product_id == window.c.product_id)
+            .order_by(window.c.units_sold.desc(), window.c.product_id)
+        )
+
+    result = await db.execute(query)
+    return [
+        TopProductResponse(
+            product_id=row.product_id,
+            product_name=row.name,
+            total_sold=int(row.units_sold),
+            total_revenue=round(row.revenue, 2),
+            last_sold_at=row.last_sold_at,
+        )
+        for row in result.all()
+    ]
+
+
+async def rebuild_product_sales(db: AsyncSession) -> int:
+    """Recompute the counters and the last SALES_BUCKET_DAYS of buckets from orders.
+
+    Returns the number of products with sales. The caller commits.
+    """
+    if db.bind.dialect.name == "sqlite":
+        # SQLite stores dates as ISO strings, which is what date() returns
+        order_day = func.date(Order.created_at)
+    else:
+        order_day = cast(Order.created_at, Date)
+    start = datetime.now(timezone.utc).date() - timedelta(days=SALES_BUCKET_DAYS)
+    counted = Order.status.not_in(EXCLUDED_STATUSES)
+    line_revenue = func.sum(OrderItem.quantity * OrderItem.price)
+
+    await db.execute(delete(ProductSales))
+    await db.execute(
+        insert(ProductSales).from_select(
+            ["product_id", "units_sold", "revenue", "last_sold_at"],
+            select(
+                OrderItem.product_id,
+                func.sum(OrderItem.quantity),
+                line_revenue,
+                func.max(Order.created_at),
+            )
+            .join(Order, Order.id == OrderItem.order_id)
+            .where(counted)
+            .group_by(OrderItem.product_id),
+        )
+    )
+
+    await db.execute(delete(ProductSalesDaily))
+    await db.execute(
+        insert(ProductSalesDaily).from_select(
+            ["day", "product_id", "units_sold", "revenue"],
+            select(
+                order_day,
+                OrderItem.product_id,
+                func.sum(OrderItem.quantity),
+                line_revenue,
+            )
+            .join(Order, Order.id == OrderItem.order_id)
+            .where(counted)
+            .where(order_day >= start)
+            .group_by(order_day, OrderItem.product_id),
+        )
+    )
+    result = await db.execute(select(func.count()).select_from(ProductSales))
+    return result.scalar() or 0
+
+
+async def prune_sales_buckets(db: AsyncSession) -> None:
+    """Drop daily buckets that no window can reach any more. The caller commits."""
+    cutoff = datetime.now(timezone.utc).date() - timedelta(days=SALES_BUCKET_DAYS)
+    await db.execute(delete(ProductSalesDaily).where(ProductSalesDaily.day < cutoff))
@@ -0,0 +1,127 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable
+
+from sqlalchemy import Date, cast, delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import dialect_insert
+from app.models import DailyRevenue, Order
+from app.schemas import RevenueDataPoint
+
+# Statuses that do not count towards revenue
+EXCLUDED_STATUSES = ("cancelled",)
+
+
+def _order_day(order: Order) -> date:
+    created_at = order.created_at or datetime.now(timezone.utc)
+    return created_at.date()
+
+
+async def _add_to_rollup(
+    db: AsyncSession,
+    day: date,
+    status: str,
+    revenue: float,
+    orders: int,
+) -> None:
+    """Atomically add revenue/order deltas to a (day, status) bucket."""
+    stmt = dialect_insert(db, DailyRevenue).values(
+        day=day,
+        status=status,
+        revenue=revenue,
+        orders=orders,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DailyRevenue.day, DailyRevenue.status],
+        set_={
+            "revenue": DailyRevenue.revenue + stmt.excluded.revenue,
+            "orders": DailyRevenue.orders + stmt.excluded.orders,
+        },
+    )
+    await db.execute(stmt)
+
+
+async def record_order_created(db: AsyncSession, order: Order) -> None:
+    """Count a newly inserted order in its day's rollup bucket."""
+    await _add_to_rollup(db, _order_day(order), order.status, order.total, 1)
+
+
+async def record_orders_created(db: AsyncSession, orders: Iterable[dict]) -> None:
+    """Count a batch of inserted order rows with one upsert per (day, status)."""
+    buckets = defaultdict(lambda: [0.0, 0])
+    for order in orders:
+        bucket = buckets[(order["created_at"].date(), order["status"])]
+        bucket[0] += order["total"]
+        bucket[1] += 1
+    for (day, status), (revenue, count) in buckets.items():
+        await _add_to_rollup(db, day, status, revenue, count)
+
+
+async def record_order_status_change(db: AsyncSession, order: Order, old_status: str) -> None:
+    """Move an order's totals from its previous status bucket to the current one."""
+    if old_status == order.status:
+        return
+    day = _order_day(order)
+    await _add_to_rollup(db, day, old_status, -order.total, -1)
+    await _add_to_rollup(db, day, order.status, order.total, 1)
+
+
+async def get_revenue_series(db: AsyncSession, days: int) -> list[RevenueDataPoint]:
+    """Return one data point per day for the last `days` days, oldest first.
+
+    Reads at most `days` x statuses rollup rows; days without orders are
+    filled with zeros.
+    """
+    today = datetime.now(timezone.utc).date()
+    start = today - timedelta(days=days - 1)
+
+    result = await db.execute(
+        select(
+            DailyRevenue.day,
+            func.sum(DailyRevenue.revenue).label("revenue"),
+            func.sum(DailyRevenue.orders).label("orders"),
+        )
+        .where(DailyRevenue.day >= start)
+        .where(DailyRevenue.status.not_in(EXCLUDED_STATUSES))
+        .group_by(DailyRevenue.day)
+    )
+    by_day = {row.day: row for row in result.all()}
+
+    data = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        row = by_day.get(day)
+        data.append(RevenueDataPoint(
+            date=day.isoformat(),
+            revenue=round(row.revenue, 2) if row else 0,
+            orders=int(row.orders) if row else 0,
+        ))
+    return data
+
+
+async def backfill_daily_revenue(db: AsyncSession) -> int:
+    """Rebuild the whole rollup from the orders table in a single statement.
+
+    Returns the number of rollup rows written. The caller commits.
+    """
+    if db.bind.dialect.name == "sqlite":
+        # SQLite stores dates as ISO strings, which is what date() returns
+        order_day = func.date(Order.created_at)
+    else:
+        order_day = cast(Order.created_at, Date)
+
+    await db.execute(delete(DailyRevenue))
+    await db.execute(
+        insert(DailyRevenue).from_select(
+            ["day", "status", "revenue", "orders"],
+            select(
+                order_day,
+                Order.status,
+                func.sum(Order.total),
+                func.count(Order.id),
+            ).group_by(order_day, Order.status),
+        )
+    )
+    result = await db.execute(select(func.count()).select_from(DailyRevenue))
+    return result.scalar() or 0
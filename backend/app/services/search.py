@@ -0,0 +1,138 @@
+import logging
+import re
+from typing import Optional
+
+from sqlalchemy import func, literal_column, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.sql import column, table
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "products_fts"
+
+# bm25 column weights: name, description, category, sku
+BM25_WEIGHTS = (10.0, 1.0, 4.0, 8.0)
+
+_products_fts = table(FTS_TABLE, column("rowid"))
+_fts = literal_column(FTS_TABLE)
+
+_INDEXED_VALUES = """
+    new.id,
+    new.name,
+    coalesce(new.description, ''),
+    coalesce((SELECT name FROM categories WHERE id = new.category_id), ''),
+    coalesce(new.sku, '')
+"""
+
+_SCHEMA = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, description, category, sku,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    # Triggers keep the index in sync with every writer, not just the API routes
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON products BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, description, category, sku)
+        VALUES ({_INDEXED_VALUES});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF name, description, category_id, sku ON products BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        INSERT INTO {FTS_TABLE}(rowid, name, description, category, sku)
+        VALUES ({_INDEXED_VALUES});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON products BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_category_au AFTER UPDATE OF name ON categories BEGIN
+        UPDATE {FTS_TABLE} SET category = new.name
+        WHERE rowid IN (SELECT id FROM products WHERE category_id = new.id);
+    END
+    """,
+]
+
+_TRIGGERS = [f"{FTS_TABLE}_ai", f"{FTS_TABLE}_au", f"{FTS_TABLE}_ad", f"{FTS_TABLE}_category_au"]
+
+_REBUILD = [
+    f"DELETE FROM {FTS_TABLE}",
+    f"""
+    INSERT INTO {FTS_TABLE}(rowid, name, description, category, sku)
+    SELECT p.id, p.name, coalesce(p.description, ''), coalesce(c.name, ''), coalesce(p.sku, '')
+    FROM products p LEFT JOIN categories c ON c.id = p.category_id
+    """,
+]
+
+
+class ProductSearchIndex:
+    """SQLite FTS5 index over product name, description, category name and SKU.
+
+    `enabled` stays False on other engines or when SQLite lacks FTS5, and
+    callers fall back to ILIKE filtering.
+    """
+
+    def __init__(self):
+        self.enabled = False
+
+    async def setup(self, conn: AsyncConnection) -> None:
+        """Create the index and triggers, rebuilding it if it is out of date."""
+        if conn.dialect.name != "sqlite":
+            self.enabled = False
+            return
+        try:
+            for statement in _SCHEMA:
+                await conn.execute(text(statement))
+        except OperationalError as e:
+            logger.warning("FTS5 unavailable, product search falls back to LIKE: %s", e)
+            self.enabled = False
+            return
+
+        indexed = (await conn.execute(text(f"SELECT count(*) FROM {FTS_TABLE}"))).scalar()
+        products = (await conn.execute(text("SELECT count(*) FROM products"))).scalar()
+        if indexed != products:
+            await self.rebuild(conn)
+        self.enabled = True
+
+    async def drop_triggers(self, conn: AsyncConnection) -> None:
+        """Stop syncing the index, e.g. for a bulk load; `setup` restores it."""
+        for trigger in _TRIGGERS:
+            await conn.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+
+    async def rebuild(self, conn: AsyncConnection) -> None:
+        for statement in _REBUILD:
+            await conn.execute(text(statement))
+
+    @staticmethod
+    def match_expression(term: str) -> Optional[str]:
+        """Turn free text into an FTS5 query: every word must match as a prefix."""
+        tokens = re.findall(r"\w+", term.lower())
+        if not tokens:
+            return None
+        return " ".join(f'"{token}"*' for token in tokens)
+
+    @staticmethod
+    def ranked_matches(match: str):
+        """Subquery of (product_id, rank) for `match`; lower rank is better."""
+        return (
+            select(
+                _products_fts.c.rowid.label("product_id"),
+                func.bm25(_fts, *BM25_WEIGHTS).label("rank"),
+            )
+            .where(_fts.op("MATCH")(match))
+            .subquery("search_matches")
+        )
+
+    @staticmethod
+    def matching_ids(match: str):
+        return select(_products_fts.c.rowid).where(_fts.op("MATCH")(match))
+
+
+product_search = ProductSearchIndex()
@@ -0,0 +1,140 @@
+import re
+from functools import lru_cache
+from typing import Callable, Iterable, TypeVar
+
+from sqlalchemy import and_, bindparam, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Product
+
+T = TypeVar("T")
+
+# Attempts at inserting with a fresh slug when a concurrent insert takes ours
+SLUG_RETRIES = 5
+
+# Bases matched per query when allocating for a batch
+SLUG_QUERY_CHUNK = 200
+
+
+def generate_slug(name: str) -> str:
+    """Generate a URL-friendly slug from a product name."""
+    slug = name.lower()
+    slug = re.sub(r'[^a-z0-9\s-]', '', slug)
+    slug = re.sub(r'[\s_-]+', '-', slug)
+    return slug.strip('-')
+
+
+def _prefix_upper_bound(prefix: str) -> str:
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("/", "//").replace("%", "/%").replace("_", "/_")
+
+
+@lru_cache(maxsize=None)
+def _families_query(dialect: str, size: int):
+    """Slugs of `size` families, `slug = base OR slug LIKE 'base-%'` each.
+
+    The bases are bind parameters, so the statement is built (and
+    compiled) once per size rather than once per batch.
+    """
+    clauses = []
+    for i in range(size):
+        suffixed = Product.slug.like(bindparam(f"pattern_{i}"), escape="/")
+        if dialect == "sqlite":
+            # SQLite's LIKE is case-insensitive and cannot use the index; the
+            # equivalent range under its binary collation can
+            suffixed = and_(Product.slug >= bindparam(f"low_{i}"), Product.slug < bindparam(f"high_{i}"), suffixed)
+        clauses.append(or_(Product.slug == bindparam(f"base_{i}"), suffixed))
+    return select(Product.slug).where(or_(*clauses))
+
+
+def _families_params(bases: list[str]) -> dict[str, str]:
+    params = {}
+    for i, base in enumerate(bases):
+        prefix = f"{base}-"
+        params[f"base_{i}"] = base
+        params[f"pattern_{i}"] = f"{_escape_like(prefix)}%"
+        params[f"low_{i}"] = prefix
+        params[f"high_{i}"] = _prefix_upper_bound(prefix)
+    return params
+
+
+class SlugAllocator:
+    """Hands out unique product slugs, `base`, then `base-1`, `base-2`, ...
+
+    `load` fetches every existing slug of the given bases' families in one
+    query per SLUG_QUERY_CHUNK bases; `allocate` then picks the lowest free
+    suffix in memory and reserves it, so a batch of products sharing a
+    name gets distinct slugs without further queries. Slugs committed by
+    other sessions after `load` are only caught by the unique index: see
+    `insert_with_unique_slug`.
+    """
+
+    def __init__(self):
+        self._taken: dict[str, set[str]] = {}
+
+    async def load(self, db: AsyncSession, bases: Iterable[str]) -> None:
+        pending = sorted({base for base in bases if base not in self._taken})
+        for start in range(0, len(pending), SLUG_QUERY_CHUNK):
+            chunk = pending[start:start + SLUG_QUERY_CHUNK]
+            for base in chunk:
+                self._taken[base] = set()
+            query = _families_query(db.bind.dialect.name, len(chunk))
+            result = await db.execute(query, _families_params(chunk))
+            for slug in result.scalars():
+                # A slug belongs to each base it equals or extends at a "-"
+                parts = slug.split("-")
+                for end in range(1, len(parts) + 1):
+                    family = self._taken.get("-".join(parts[:end]))
+                    if family is not None:
+                        family.add(slug)
+
+    def allocate(self, base: str) -> str:
+        """Reserve the lowest free slug for `base`, which must have been loaded."""
+        taken = self._taken[base]
+        slug = base
+        counter = 1
+        while slug in taken:
+            slug = f"{base}-{counter}"
+            counter += 1
+        taken.add(slug)
+        return slug
+
+    def forget(self, base: str) -> None:
+        """Drop what is known about `base` so the next `load` re-reads it."""
+        self._taken.pop(base, None)
+
+
+def is_slug_conflict(error: IntegrityError) -> bool:
+    return "slug" in str(error.orig).lower()
+
+
+async def insert_with_unique_slug(
+    db: AsyncSession,
+    base: str,
+    build: Callable[[str], T],
+    retries: int = SLUG_RETRIES,
+) -> T:
+    """Add `build(slug)` with the next free slug for `base` and flush it.
+
+    The insert runs in a savepoint; if a concurrent insert took the slug
+    in the meantime, the family is re-read and the insert retried.
+    Other integrity errors propagate. The caller commits.
+    """
+    allocator = SlugAllocator()
+    attempts = 0
+    while True:
+        await allocator.load(db, [base])
+        obj = build(allocator.allocate(base))
+        try:
+            async with db.begin_nested():
+                db.add(obj)
+            return obj
+        except IntegrityError as e:
+            attempts += 1
+            if not is_slug_conflict(e) or attempts >= retries:
+                raise
+            allocator.forget(base)
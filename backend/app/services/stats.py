@@ -0,0 +1,86 @@
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.singleflight import analytics_flight
+from app.models import Customer, Order, Product
+from app.services.revenue import EXCLUDED_STATUSES
+
+ORDER_STATUSES = ("pending", "processing", "shipped", "delivered", "cancelled")
+
+
+@dataclass(frozen=True)
+class StatsSnapshot:
+    total_revenue: float
+    total_orders: int
+    orders_by_status: dict[str, int]
+    total_customers: int
+    total_products: int
+
+    @property
+    def average_order_value(self) -> float:
+        return self.total_revenue / self.total_orders if self.total_orders > 0 else 0
+
+
+async def compute_stats(db: AsyncSession) -> StatsSnapshot:
+    """Compute every dashboard counter in a single round trip."""
+    status_counts = [
+        func.coalesce(func.sum(case((Order.status == status_name, 1), else_=0)), 0)
+        for status_name in ORDER_STATUSES
+    ]
+    query = select(
+        func.count(Order.id),
+        func.coalesce(
+            func.sum(case((Order.status.not_in(EXCLUDED_STATUSES), Order.total), else_=0)), 0
+        ),
+        select(func.count(Customer.id)).scalar_subquery(),
+        select(func.count(Product.id)).scalar_subquery(),
+        *status_counts,
+    )
+    row = (await db.execute(query)).one()
+    total_orders, total_revenue, total_customers, total_products = row[:4]
+    return StatsSnapshot(
+        total_revenue=float(total_revenue),
+        total_orders=total_orders,
+        orders_by_status=dict(zip(ORDER_STATUSES, (int(count) for count in row[4:]))),
+        total_customers=total_customers,
+        total_products=total_products,
+    )
+
+
+class StatsCache:
+    """In-process stats snapshot that expires after `STATS_CACHE_TTL_SECONDS`.
+
+    Order writes call `invalidate()`; a computation that started before an
+    invalidation is returned to its caller but not stored. Concurrent misses
+    share one computation, and only with requests of the same generation,
+    so a read that follows a write never gets a snapshot from before it.
+    """
+
+    def __init__(self):
+        self._snapshot: Optional[StatsSnapshot] = None
+        self._expires_at = 0.0
+        self._generation = 0
+
+    async def get(self, db: AsyncSession) -> StatsSnapshot:
+        now = time.monotonic()
+        if self._snapshot is not None and now < self._expires_at:
+            return self._snapshot
+
+        generation = self._generation
+        snapshot = await analytics_flight.do("stats", generation, lambda: compute_stats(db))
+        if generation == self._generation:
+            self._snapshot = snapshot
+            self._expires_at = now + settings.STATS_CACHE_TTL_SECONDS
+        return snapshot
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._snapshot = None
+
+
+stats_cache = StatsCache()
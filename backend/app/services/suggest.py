@@ -0,0 +1,233 @@
+import asyncio
+import heapq
+import logging
+import re
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Any, NamedTuple, Optional
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import read_session_maker
+from app.models import Product, ProductSales
+
+logger = logging.getLogger(__name__)
+
+# Results memoized per (prefix, limit) until the next change; short
+# prefixes match thousands of terms, and they are the most common queries
+SUGGEST_MEMO_MAX_ENTRIES = 4096
+
+# Past this many matching terms, walking products best-selling first and
+# stopping at `limit` matches beats ranking every match
+SUGGEST_RANGE_SCAN_LIMIT = 1000
+
+
+class _Product(NamedTuple):
+    id: int
+    name: str
+    slug: Optional[str]
+    sku: Optional[str]
+    price: float
+    terms: tuple[str, ...]
+
+
+def normalize_term(text: Optional[str]) -> str:
+    """Lowercase words without accents or punctuation, joined by single spaces."""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(re.findall(r"\w+", text.lower()))
+
+
+def _terms(name: str, sku: Optional[str]) -> tuple[str, ...]:
+    """Every word-aligned tail of the name, so "mug" finds "Ceramic Mug", and the SKU."""
+    words = normalize_term(name).split(" ")
+    terms = {" ".join(words[start:]) for start in range(len(words))}
+    terms.add(normalize_term(sku))
+    terms.discard("")
+    return tuple(sorted(terms))
+
+
+def _prefix_upper_bound(prefix: str) -> str:
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class ProductSuggestIndex:
+    """In-memory prefix index over active products' names and SKUs.
+
+    Terms are kept in one sorted list of (term, product_id); a prefix is a
+    contiguous range of it, found by bisection, and its products are
+    ranked by units sold (`product_sales`). Broad prefixes instead walk a
+    list of the products in rank order. `build` loads it from the
+    database at startup. Product writes through the API update it in
+    place; it is also rebuilt in the background every
+    `SUGGEST_REFRESH_SECONDS`, which picks up new sales and writes made by
+    other workers.
+    """
+
+    def __init__(self):
+        self._terms: list[tuple[str, int]] = []
+        self._products: dict[int, _Product] = {}
+        self._popularity: dict[int, int] = {}
+        self._ranked: list[tuple[int, str, int]] = []  # (-units sold, name, id), best first
+        self._memo: dict[tuple[str, int], list[dict[str, Any]]] = {}
+        self._expires_at = 0.0
+        self._refreshing: Optional[asyncio.Task] = None
+        self._invalidated = False  # Since the current build started
+        self._replay: Optional[list[tuple[str, Any]]] = None  # Writes made during a build
+
+    async def build(self, db) -> None:
+        """(Re)load the index from an AsyncSession or AsyncConnection."""
+        self._replay = []
+        self._invalidated = False
+        try:
+            result = await db.execute(
+                select(Product.id, Product.name, Product.slug, Product.sku, Product.price, ProductSales.units_sold)
+                .outerjoin(ProductSales, ProductSales.product_id == Product.id)
+                .where(Product.is_active)
+            )
+            rows = result.all()
+            # Sorting a large catalog takes a while; keep the event loop free
+            compiled = await asyncio.to_thread(self._compile, rows)
+            self._terms, self._products, self._popularity, self._ranked = compiled
+            self._memo = {}
+            # The rows may predate writes applied meanwhile; apply them again
+            replay, self._replay = self._replay, None
+            for operation, argument in replay:
+                getattr(self, operation)(argument)
+        finally:
+            self._replay = None
+            interval = settings.SUGGEST_REFRESH_SECONDS
+            if self._invalidated:
+                self._expires_at = 0.0  # The rows may predate it
+            else:
+                self._expires_at = time.monotonic() + interval if interval > 0 else float("inf")
+
+    @staticmethod
+    def _compile(rows):
+        terms = []
+        products = {}
+        popularity = {}
+        for product_id, name, slug, sku, price, units_sold in rows:
+            product = _Product(product_id, name, slug, sku, price, _terms(name, sku))
+            products[product_id] = product
+            terms.extend((term, product_id) for term in product.terms)
+            if units_sold:
+                popularity[product_id] = units_sold
+        terms.sort()
+        ranked = sorted(
+            (-popularity.get(product_id, 0), product.name, product_id)
+            for product_id, product in products.items()
+        )
+        return terms, products, popularity, ranked
+
+    def add(self, product: Product) -> None:
+        """Index a created or updated product (or drop it, if it is inactive)."""
+        if self._replay is not None:
+            self._replay.append(("add", product))
+        self._drop(product.id)
+        if product.is_active:
+            entry = _Product(product.id, product.name, product.slug, product.sku, product.price, _terms(product.name, product.sku))
+            self._products[entry.id] = entry
+            for term in entry.terms:
+                insort(self._terms, (term, entry.id))
+            insort(self._ranked, self._rank(entry))
+        self._memo = {}
+
+    def remove(self, product_id: int) -> None:
+        if self._replay is not None:
+            self._replay.append(("remove", product_id))
+        self._drop(product_id)
+        self._memo = {}
+
+    def invalidate(self) -> None:
+        """Rebuild now, in the background, e.g. after a bulk import.
+
+        A rebuild already running may have read the rows too early, so
+        another one follows it.
+        """
+        self._invalidated = True
+        self._expires_at = 0.0
+        self._schedule_refresh()
+
+    def _rank(self, entry: _Product) -> tuple[int, str, int]:
+        return (-self._popularity.get(entry.id, 0), entry.name, entry.id)
+
+    @staticmethod
+    def _discard(items: list, item) -> None:
+        position = bisect_left(items, item)
+        if position < len(items) and items[position] == item:
+            del items[position]
+
+    def _drop(self, product_id: int) -> None:
+        entry = self._products.pop(product_id, None)
+        if entry is None:
+            return
+        for term in entry.terms:
+            self._discard(self._terms, (term, product_id))
+        self._discard(self._ranked, self._rank(entry))
+
+    def suggest(self, q: str, limit: int = 10) -> list[dict[str, Any]]:
+        """The `limit` most sold products with a name word or SKU starting with `q`."""
+        self._schedule_refresh()
+        prefix = normalize_term(q)
+        if not prefix:
+            return []
+        if q[-1:].isspace():
+            prefix += " "  # "mug " matches "mug holder", not "mugs"
+
+        key = (prefix, limit)
+        suggestions = self._memo.get(key)
+        if suggestions is not None:
+            return suggestions
+
+        start = bisect_left(self._terms, (prefix,))
+        end = bisect_left(self._terms, (_prefix_upper_bound(prefix),), start)
+        if end - start > SUGGEST_RANGE_SCAN_LIMIT:
+            best = []
+            for _, _, product_id in self._ranked:
+                if any(term.startswith(prefix) for term in self._products[product_id].terms):
+                    best.append(product_id)
+                    if len(best) == limit:
+                        break
+        else:
+            matched = {product_id for _, product_id in self._terms[start:end]}
+            best = [
+                product_id
+                for _, _, product_id in heapq.nsmallest(limit, (self._rank(self._products[product_id]) for product_id in matched))
+            ]
+        suggestions = [
+            {"id": entry.id, "name": entry.name, "slug": entry.slug, "sku": entry.sku, "price": entry.price}
+            for entry in (self._products[product_id] for product_id in best)
+        ]
+        if len(self._memo) >= SUGGEST_MEMO_MAX_ENTRIES:
+            self._memo = {}
+        self._memo[key] = suggestions
+        return suggestions
+
+    def _schedule_refresh(self) -> None:
+        if self._refreshing is None and time.monotonic() >= self._expires_at:
+            self._refreshing = asyncio.create_task(self._refresh())
+
+    async def _refresh(self) -> None:
+        try:
+            async with read_session_maker() as session:
+                await self.build(session)
+        except Exception:
+            logger.exception("Rebuilding the product suggest index failed")
+            # Retried after the refresh interval, not on every query
+            self._invalidated = False
+            self._expires_at = time.monotonic() + settings.SUGGEST_REFRESH_SECONDS
+        finally:
+            self._refreshing = None
+        if self._invalidated:
+            self._schedule_refresh()
+
+    def stats(self) -> dict[str, int]:
+        return {"products": len(self._products), "terms": len(self._terms)}
+
+
+product_suggest = ProductSuggestIndex()
@@ -0,0 +1,62 @@
+"""Compare two benchmark reports.
+
+Usage (from backend/):
+    python -m benchmarks.compare before.json after.json [--threshold 10]
+
+Exits with status 1 if any scenario's p95 latency grew by more than
+--threshold percent, or its throughput dropped by more than that.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def _change(before: float, after: float) -> float:
+    return (after - before) / before * 100 if before else 0.0
+
+
+def compare(before: dict, after: dict, threshold: float) -> tuple[list[str], bool]:
+    lines = [f"{'scenario':<24}{'p50 ms':>18}{'p95 ms':>18}{'p99 ms':>18}{'req/s':>18}{'stmts':>10}"]
+    regressed = False
+    for name, new in after["scenarios"].items():
+        old = before["scenarios"].get(name)
+        if old is None:
+            lines.append(f"{name:<24}(new)")
+            continue
+        cells = []
+        for pct in ("p50", "p95", "p99"):
+            a, b = old["latency_ms"][pct], new["latency_ms"][pct]
+            cells.append(f"{b:>9.2f} {_change(a, b):+6.1f}%")
+        a, b = old["throughput_rps"], new["throughput_rps"]
+        cells.append(f"{b:>9.1f} {_change(a, b):+6.1f}%")
+        cells.append(f"{new['db_statements_per_request']:>10}")
+        lines.append(f"{name:<24}" + "".join(f"{cell:>18}" for cell in cells[:-1]) + cells[-1])
+
+        if (_change(old["latency_ms"]["p95"], new["latency_ms"]["p95"]) > threshold
+                or _change(old["throughput_rps"], new["throughput_rps"]) < -threshold):
+            regressed = True
+            lines.append(f"  ^ regression beyond {threshold}%")
+        if new["db_statements_per_request"] > old["db_statements_per_request"]:
+            lines.append(
+                f"  ^ statements per request {old['db_statements_per_request']} -> {new['db_statements_per_request']}"
+            )
+    return lines, regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark reports")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Allowed regression in percent")
+    args = parser.parse_args()
+
+    before = json.loads(Path(args.before).read_text())
+    after = json.loads(Path(args.after).read_text())
+    lines, regressed = compare(before, after, args.threshold)
+    print("\n".join(lines))
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""API hot-path benchmarks, driven in-process over ASGI.
+
+Usage (from backend/):
+    python -m benchmarks.run --scale small --output report.json
+    python -m benchmarks.compare before.json after.json
+
+The dataset for each scale is generated once into benchmarks/.data and
+reused by later runs; pass --reseed to rebuild it. Application caches
+are disabled unless --with-caches is given, so the numbers reflect the
+work done per request rather than cache hit rates.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Optional
+
+DATA_DIR = Path(__file__).resolve().parent / ".data"
+
+# Dataset presets, mirrored from app.datagen.SCALES (importing it here
+# would load the app before the environment is configured)
+SCALE_NAMES = ["tiny", "small", "medium", "large"]
+
+BENCH_EMAIL = "bench@example.com"
+BENCH_PASSWORD = "bench-password"
+SEARCH_TERMS = ["ceramic", "linen vase", "mug", "oak shelf", "candle", "wool", "lamp", "rattan basket", "glass", "nordic"]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the NexusStore API hot paths")
+    parser.add_argument("--scale", choices=SCALE_NAMES, default="tiny")
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per scenario")
+    parser.add_argument("--login-requests", type=int, default=20, help="Measured requests for login (bcrypt bound)")
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--scenario", action="append", help="Only run the named scenario(s)")
+    parser.add_argument("--database", help="Database file (default: benchmarks/.data/<scale>.db)")
+    parser.add_argument("--reseed", action="store_true", help="Regenerate the dataset")
+    parser.add_argument("--with-caches", action="store_true", help="Keep application caches enabled")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout)")
+    return parser.parse_args(argv)
+
+
+def configure_environment(args) -> Path:
+    """Point the app at the benchmark database; must run before importing it."""
+    database = Path(args.database) if args.database else DATA_DIR / f"{args.scale}.db"
+    database.parent.mkdir(parents=True, exist_ok=True)
+    if args.reseed:
+        for suffix in ("", "-wal", "-shm"):
+            Path(f"{database}{suffix}").unlink(missing_ok=True)
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{database}"
+    os.environ["DEBUG"] = "false"
+    if not args.with_caches:
+        os.environ["CATALOG_CACHE_TTL_SECONDS"] = "0"
+        os.environ["STATS_CACHE_TTL_SECONDS"] = "0"
+        os.environ["PRINCIPAL_CACHE_TTL_SECONDS"] = "0"
+    return database
+
+
+async def prepare_dataset(args) -> dict:
+    from sqlalchemy import func, select
+
+    from app.core.database import async_session_maker, engine, init_db
+    from app.core.security import get_password_hash_async
+    from app.datagen import SCALES, load_dataset
+    from app.models import Category, Customer, Order, OrderItem, Product, User
+
+    await init_db()
+    async with async_session_maker() as session:
+        seeded = (await session.execute(select(func.count(Order.id)))).scalar()
+    if not seeded:
+        print(f"Generating {args.scale} dataset...", file=sys.stderr)
+        started = time.perf_counter()
+        await load_dataset(engine, SCALES[args.scale], seed=args.seed)
+        async with async_session_maker() as session:
+            session.add(User(
+                email=BENCH_EMAIL,
+                hashed_password=await get_password_hash_async(BENCH_PASSWORD),
+                role="admin",
+            ))
+            await session.commit()
+        print(f"Dataset ready in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    counts = {}
+    async with async_session_maker() as session:
+        for name, model in (
+            ("categories", Category),
+            ("products", Product),
+            ("customers", Customer),
+            ("orders", Order),
+            ("order_items", OrderItem),
+        ):
+            counts[name] = (await session.execute(select(func.count(model.id)))).scalar()
+    return counts
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    route: str  # Path template, as labelled in /metrics
+    build: Callable[[random.Random, dict], dict]  # Returns httpx request kwargs
+    requests: Optional[int] = None
+
+
+def _list_products(rng, ctx):
+    return {"url": "/api/products/", "params": {"search": rng.choice(SEARCH_TERMS), "limit": 20}}
+
+
+def _list_orders(rng, ctx):
+    # Full pages with customer and items (product and category) expanded
+    return {"url": "/api/orders/", "params": {"skip": rng.randrange(0, 500), "limit": 100}, "headers": ctx["auth"]}
+
+
+def _dashboard_stats(rng, ctx):
+    return {"url": "/api/analytics/stats", "headers": ctx["auth"]}
+
+
+def _top_products(rng, ctx):
+    return {"url": "/api/analytics/top-products", "params": {"limit": 10}, "headers": ctx["auth"]}
+
+
+def _create_order(rng, ctx):
+    items = [
+        {"product_id": rng.choice(ctx["product_ids"]), "quantity": rng.randint(1, 3), "price": 10.0}
+        for _ in range(rng.randint(1, 5))
+    ]
+    subtotal = sum(item["quantity"] * item["price"] for item in items)
+    return {
+        "url": "/api/orders/",
+        "json": {
+            "customer_id": rng.choice(ctx["customer_ids"]),
+            "subtotal": subtotal,
+            "total": subtotal,
+            "items": items,
+        },
+        "headers": ctx["auth"],
+    }
+
+
+def _login(rng, ctx):
+    return {"url": "/api/auth/login", "data": {"username": BENCH_EMAIL, "password": BENCH_PASSWORD}}
+
+
+def scenarios(args) -> list[Scenario]:
+    return [
+        Scenario("list_products_search", "GET", "/api/products/", _list_products),
+        Scenario("list_orders", "GET", "/api/orders/", _list_orders),
+        Scenario("dashboard_stats", "GET", "/api/analytics/stats", _dashboard_stats),
+        Scenario("top_products", "GET", "/api/analytics/top-products", _top_products),
+        Scenario("create_order", "POST", "/api/orders/", _create_order),
+        Scenario("login", "POST", "/api/auth/login", _login, requests=args.login_requests),
+    ]
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+async def run_scenario(client, scenario: Scenario, ctx: dict, args) -> dict:
+    from app.core.metrics import request_metrics
+
+    rng = random.Random(f"{args.seed}:{scenario.name}")
+    total = scenario.requests or args.requests
+    latencies: list[float] = []
+    statuses: dict[str, int] = {}
+
+    async def send():
+        kwargs = scenario.build(rng, ctx)
+        start = time.perf_counter()
+        response = await client.request(scenario.method, **kwargs)
+        return time.perf_counter() - start, response.status_code
+
+    for _ in range(args.warmup):
+        await send()
+
+    series = request_metrics.route_series(scenario.method, scenario.route)
+    statements_before = series.db_statements.sum
+    count_before = sum(series.db_statements.counts)
+
+    remaining = total
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            latency, status_code = await send()
+            latencies.append(latency)
+            statuses[str(status_code)] = statuses.get(str(status_code), 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(args.concurrency, total))))
+    elapsed = time.perf_counter() - started
+
+    measured = sum(series.db_statements.counts) - count_before
+    latencies.sort()
+    return {
+        "requests": total,
+        "concurrency": min(args.concurrency, total),
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0,
+        "latency_ms": {
+            "min": ms(latencies[0]),
+            "mean": ms(sum(latencies) / len(latencies)),
+            "p50": ms(percentile(latencies, 50)),
+            "p95": ms(percentile(latencies, 95)),
+            "p99": ms(percentile(latencies, 99)),
+            "max": ms(latencies[-1]),
+        },
+        "db_statements_per_request": round((series.db_statements.sum - statements_before) / measured, 2) if measured else 0,
+        "status_codes": dict(sorted(statuses.items())),
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main(args) -> dict:
+    database = configure_environment(args)
+
+    import httpx
+    import sqlalchemy
+    from sqlalchemy import select
+
+    from app.core.database import read_session_maker
+    from app.core.security import create_access_token
+    from app.main import app
+    from app.models import Customer, Product
+
+    counts = await prepare_dataset(args)
+    async with read_session_maker() as session:
+        ctx = {
+            "auth": {"Authorization": f"Bearer {create_access_token({'sub': BENCH_EMAIL})}"},
+            "product_ids": list((await session.execute(select(Product.id).limit(1000))).scalars()),
+            "customer_ids": list((await session.execute(select(Customer.id).limit(1000))).scalars()),
+        }
+
+    selected = [s for s in scenarios(args) if not args.scenario or s.name in args.scenario]
+    results = {}
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for scenario in selected:
+                print(f"Running {scenario.name}...", file=sys.stderr)
+                results[scenario.name] = await run_scenario(client, scenario, ctx, args)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "platform": platform.platform(),
+            "scale": args.scale,
+            "database": str(database),
+            "dataset": counts,
+            "caches": args.with_caches,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+        },
+        "scenarios": results,
+    }
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    report = asyncio.run(main(arguments))
+    rendered = json.dumps(report, indent=2, sort_keys=True) + "\n"
+    if arguments.output:
+        Path(arguments.output).write_text(rendered)
+    else:
+        sys.stdout.write(rendered)
@@ -0,0 +1,94 @@
+"""Check that order responses cost a fixed number of SQL statements.
+
+Usage (from backend/):
+    python -m benchmarks.statements --scale tiny
+
+Requests `GET /api/orders/` at several page sizes and `GET /api/orders/{id}`
+for every `expand=` combination, and exits non-zero if the statement count
+of any combination changes with the page size (an N+1 query) or exceeds
+its expected budget. Uses the benchmark dataset (see benchmarks.run).
+"""
+import argparse
+import asyncio
+import sys
+
+from benchmarks.run import BENCH_EMAIL, SCALE_NAMES, configure_environment, prepare_dataset
+
+PAGE_SIZES = (1, 10, 50, 100)
+
+# expand= value -> statements beyond the order query itself (and auth)
+EXPAND_QUERIES = {
+    None: 3,  # customers, items with products, categories
+    "": 0,
+    "customer": 1,
+    "items": 1,
+    "items.product": 2,
+    "customer,items": 2,
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Check the statement count of order responses")
+    parser.add_argument("--scale", choices=SCALE_NAMES, default="tiny")
+    parser.add_argument("--database", help="Database file (default: benchmarks/.data/<scale>.db)")
+    parser.add_argument("--reseed", action="store_true", help="Regenerate the dataset")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+async def statements_for(client, series, url: str, params: dict, headers: dict) -> int:
+    before = series.db_statements.sum
+    response = await client.get(url, params=params, headers=headers)
+    response.raise_for_status()
+    return int(series.db_statements.sum - before)
+
+
+async def main(args) -> bool:
+    args.with_caches = False
+    configure_environment(args)
+
+    import httpx
+    from sqlalchemy import func, select
+
+    from app.core.database import read_session_maker
+    from app.core.metrics import request_metrics
+    from app.core.security import create_access_token
+    from app.main import app
+    from app.models import OrderItem
+
+    await prepare_dataset(args)
+    async with read_session_maker() as session:
+        # An order with items, so the single-order check loads every level
+        order_id = (await session.execute(
+            select(OrderItem.order_id).group_by(OrderItem.order_id).having(func.count() > 1).limit(1)
+        )).scalar()
+    auth = {"Authorization": f"Bearer {create_access_token({'sub': BENCH_EMAIL})}"}
+
+    list_series = request_metrics.route_series("GET", "/api/orders/")
+    get_series = request_metrics.route_series("GET", "/api/orders/{order_id}")
+    ok = True
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            # Auth and the order query itself, measured with nothing expanded
+            base = await statements_for(client, get_series, f"/api/orders/{order_id}", {"expand": ""}, auth)
+            for expand, extra in EXPAND_QUERIES.items():
+                params = {} if expand is None else {"expand": expand}
+                counts = [
+                    await statements_for(client, list_series, "/api/orders/", {**params, "limit": size}, auth)
+                    for size in PAGE_SIZES
+                ]
+                single = await statements_for(client, get_series, f"/api/orders/{order_id}", params, auth)
+                expected = base + extra
+                passed = all(count == expected for count in counts) and single == expected
+                ok &= passed
+                label = "(all)" if expand is None else repr(expand)
+                print(
+                    f"{'ok  ' if passed else 'FAIL'} expand={label:<18} expected {expected}  "
+                    f"list {dict(zip(PAGE_SIZES, counts))}  get {single}"
+                )
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main(parse_args())) else 1)
@@ -0,0 +1,16 @@
+"""Point the app at a throwaway database before any test imports it."""
+import os
+import shutil
+import tempfile
+
+_data_dir = tempfile.mkdtemp(prefix="nexusstore-tests-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_data_dir}/test.db"
+os.environ["DEBUG"] = "false"
+# Caches would make statement counts depend on earlier requests
+os.environ["CATALOG_CACHE_TTL_SECONDS"] = "0"
+os.environ["STATS_CACHE_TTL_SECONDS"] = "0"
+os.environ["PRINCIPAL_CACHE_TTL_SECONDS"] = "0"
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(_data_dir, ignore_errors=True)
@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+from app.core.feeds import read_csv
+
+
+def parse(data: bytes, chunk_size: int) -> list:
+    async def chunks():
+        for start in range(0, len(data), chunk_size):
+            yield data[start:start + chunk_size]
+
+    async def collect():
+        return [record async for record in read_csv(chunks())]
+
+    return asyncio.run(collect())
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 4096])
+def test_stray_quote_in_unquoted_field(chunk_size):
+    data = b'sku,name,price\nA,27" Monitor,100\nB,Mug,5\nC,Cup,3\n'
+    assert parse(data, chunk_size) == [
+        (0, {"sku": "A", "name": '27" Monitor', "price": "100"}, None),
+        (1, {"sku": "B", "name": "Mug", "price": "5"}, None),
+        (2, {"sku": "C", "name": "Cup", "price": "3"}, None),
+    ]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 4096])
+def test_quoted_field_spanning_lines(chunk_size):
+    data = b'\xef\xbb\xbfsku,description\r\nA,"multi\r\nline ""quoted"""\r\n\r\nB,x\r\n'
+    assert parse(data, chunk_size) == [
+        (0, {"sku": "A", "description": 'multi\nline "quoted"'}, None),
+        (1, {"sku": "B", "description": "x"}, None),
+    ]
+
+
+def test_wrong_field_count():
+    assert parse(b"sku,name\nA,b,c\nB,\n", 4096) == [
+        (0, None, "Expected 2 fields, got 3"),
+        (1, {"sku": "B"}, None),
+    ]
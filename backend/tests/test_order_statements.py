@@ -0,0 +1,71 @@
+"""Order responses cost a fixed number of SQL statements, whatever the page size.
+
+The checks of `python -m benchmarks.statements`, on a small generated
+dataset.
+"""
+import asyncio
+
+import httpx
+import pytest
+from sqlalchemy import func, select
+
+from app.core.database import async_session_maker, engine, init_db, read_engine
+from app.core.metrics import request_metrics
+from app.core.security import create_access_token, get_password_hash_async
+from app.datagen import DatasetSize, load_dataset
+from app.main import app
+from app.models import OrderItem, User
+from benchmarks.statements import EXPAND_QUERIES, PAGE_SIZES, statements_for
+
+EMAIL = "statements@example.com"
+
+
+async def _measure() -> dict:
+    """{expand: (expected, counts by page size, single order count)}"""
+    try:
+        await init_db()
+        await load_dataset(engine, DatasetSize(products=50, customers=20, orders=200, items_per_order=3))
+        async with async_session_maker() as session:
+            session.add(User(email=EMAIL, hashed_password=await get_password_hash_async("statements"), role="admin"))
+            await session.commit()
+            order_id = (await session.execute(
+                select(OrderItem.order_id).group_by(OrderItem.order_id).having(func.count() > 1).limit(1)
+            )).scalar()
+        auth = {"Authorization": f"Bearer {create_access_token({'sub': EMAIL})}"}
+
+        list_series = request_metrics.route_series("GET", "/api/orders/")
+        get_series = request_metrics.route_series("GET", "/api/orders/{order_id}")
+        measured = {}
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                base = await statements_for(client, get_series, f"/api/orders/{order_id}", {"expand": ""}, auth)
+                for expand, extra in EXPAND_QUERIES.items():
+                    params = {} if expand is None else {"expand": expand}
+                    counts = {
+                        size: await statements_for(client, list_series, "/api/orders/", {**params, "limit": size}, auth)
+                        for size in PAGE_SIZES
+                    }
+                    single = await statements_for(client, get_series, f"/api/orders/{order_id}", params, auth)
+                    measured[expand] = (base + extra, counts, single)
+        return measured
+    finally:
+        await engine.dispose()
+        await read_engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def measured() -> dict:
+    return asyncio.run(_measure())
+
+
+@pytest.mark.parametrize("expand", list(EXPAND_QUERIES))
+def test_list_statements_do_not_grow_with_page_size(measured, expand):
+    expected, counts, _ = measured[expand]
+    assert counts == {size: expected for size in PAGE_SIZES}
+
+
+@pytest.mark.parametrize("expand", list(EXPAND_QUERIES))
+def test_single_order_statements(measured, expand):
+    expected, _, single = measured[expand]
+    assert single == expected